@@ -0,0 +1,3 @@
+from disfake.core.stats import stats
+
+__all__ = ("stats",)
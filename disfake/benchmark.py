@@ -0,0 +1,352 @@
+"""Benchmarks of the generation hot paths
+
+Run all benchmarks and print a table with::
+
+    python -m disfake.benchmark
+
+``--json results.json`` also writes the results as JSON, and
+``--compare results.json`` fails if a benchmark got slower than a previous run.
+Every benchmark runs in its own seeded
+:class:`~disfake.core.context.GenerationContext`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from discord_typings import GuildData, ReadyEvent, UserData
+
+from disfake.core import context, generator
+from disfake.core.context import GenerationContext
+
+__all__ = ("Case", "Result", "cases", "run", "compare")
+
+SEED = 0
+
+# The function to time, optionally with its teardown
+_Setup = Union[Callable[[], Any], Tuple[Callable[[], Any], Callable[[], None]]]
+
+
+@dataclass(frozen=True)
+class Case:
+    """A benchmark
+
+    ``setup`` runs once in the context of the benchmark and returns the
+    function to time, or the function and a teardown which is called once the
+    benchmark finished. Every call of the function counts as ``ops``
+    operations.
+    """
+
+    name: str
+    setup: Callable[[GenerationContext], _Setup]
+    ops: int = 1
+    # Benchmarks which are slow to set up or run are excluded by --quick
+    slow: bool = False
+
+
+@dataclass(frozen=True)
+class Result:
+    """The measurements of a :class:`Case`, times are in seconds per call"""
+
+    name: str
+    calls: int
+    ops_per_sec: float
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    peak_memory: int
+
+
+def _generate(type_: Any) -> Callable[[GenerationContext], Callable[[], Any]]:
+    def setup(ctx: GenerationContext) -> Callable[[], Any]:
+        return lambda: generator.generate(type_)
+
+    return setup
+
+
+def _snowflakes(ctx: GenerationContext) -> Callable[[], Any]:
+    snowflake = ctx.snowflake.snowflake
+
+    def run() -> None:
+        for _ in range(10_000):
+            snowflake()
+
+    return run
+
+
+def _guild(member_count: int) -> Callable[[GenerationContext], Callable[[], Any]]:
+    from disfake.http import guild
+
+    def setup(ctx: GenerationContext) -> Callable[[], Any]:
+        def run() -> None:
+            guild.generate(member_count=member_count)
+            # Guilds must not pile up in the caches between calls
+            ctx.users.clear()
+            ctx.members.clear()
+
+        return run
+
+    return setup
+
+
+def _promote_guild(ctx: GenerationContext) -> Callable[[], Any]:
+    from disfake.gateway.promotors import promote_guild
+    from disfake.http import guild
+
+    generated = guild.generate(member_count=1_000)
+    return lambda: promote_guild(generated, include_members=True)
+
+
+def _user_lookups(ctx: GenerationContext) -> Callable[[], Any]:
+    from disfake.http import guild
+
+    guild.generate(member_count=10_000)
+    ids = list(ctx.users)
+    ctx.random.shuffle(ids)
+    get = ctx.users.get
+
+    def run() -> None:
+        for id in ids:
+            get(id)
+
+    return run
+
+
+def _member_lookups(ctx: GenerationContext) -> Callable[[], Any]:
+    from disfake.http import guild
+
+    generated = guild.generate(member_count=10_000)
+    ids = list(ctx.users)
+    ctx.random.shuffle(ids)
+    member = ctx.members.member
+
+    def run() -> None:
+        for id in ids:
+            member(generated["id"], id)
+
+    return run
+
+
+def _event_storm(ctx: GenerationContext) -> _Setup:
+    from disfake import world
+    from disfake.gateway.storms import EventStorm
+
+    guilds = world.generate_world(20, 20_000, 1_000)
+    storm = EventStorm([guild["id"] for guild in guilds], ctx=ctx)
+    return lambda: storm.batch(10_000), storm.close
+
+
+def cases() -> List[Case]:
+    """The bundled benchmarks"""
+    return [
+        Case("generate.UserData", _generate(UserData)),
+        Case("generate.GuildData", _generate(GuildData)),
+        Case("generate.ReadyEvent", _generate(ReadyEvent)),
+        Case("snowflake.snowflake", _snowflakes, ops=10_000),
+        Case("guild.generate[10]", _guild(10)),
+        Case("guild.generate[10000]", _guild(10_000)),
+        Case("guild.generate[250000]", _guild(250_000), slow=True),
+        Case("promote_guild[1000]", _promote_guild),
+        Case("users.get", _user_lookups, ops=10_001),
+        Case("members.member", _member_lookups, ops=10_001),
+        Case("EventStorm.batch", _event_storm, ops=10_000),
+    ]
+
+
+def _percentile(timings: Sequence[float], percent: float) -> float:
+    return timings[min(int(len(timings) * percent / 100), len(timings) - 1)]
+
+
+def _measure(case: Case, min_time: float, max_calls: int) -> Result:
+    with context.isolated(seed=SEED) as ctx:
+        prepared = case.setup(ctx)
+        teardown: Optional[Callable[[], None]] = None
+        if callable(prepared):
+            function = prepared
+        else:
+            function, teardown = prepared
+        try:
+            function()
+
+            timings: List[float] = []
+            started = time.perf_counter()
+            while len(timings) < max_calls:
+                start = time.perf_counter()
+                function()
+                end = time.perf_counter()
+                timings.append(end - start)
+                if end - started >= min_time:
+                    break
+
+            # Tracing slows everything down, memory is measured in a separate
+            # call
+            tracemalloc.start()
+            try:
+                function()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        finally:
+            if teardown is not None:
+                teardown()
+
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    return Result(
+        case.name,
+        len(timings),
+        case.ops / mean,
+        mean,
+        _percentile(timings, 50),
+        _percentile(timings, 90),
+        _percentile(timings, 99),
+        peak,
+    )
+
+
+def run(
+    selected: Optional[Sequence[Case]] = None,
+    *,
+    min_time: float = 1.0,
+    max_calls: int = 100_000,
+    progress: Optional[Callable[[Result], None]] = None,
+) -> List[Result]:
+    """Run benchmarks
+
+    Parameters
+    ----------
+    selected : Optional[Sequence[Case]]
+        The benchmarks to run, by default all of :func:`cases`
+    min_time : float
+        How long every benchmark is timed for, in seconds. Every benchmark is
+        called at least once.
+    max_calls : int
+        The maximum amount of timed calls per benchmark
+    progress : Optional[Callable[[Result], None]]
+        Called with the result of every benchmark once it finished
+
+    Returns
+    -------
+    List[Result]
+        The results in the order of the benchmarks
+    """
+    results: List[Result] = []
+    for case in cases() if selected is None else selected:
+        result = _measure(case, min_time, max_calls)
+        if progress is not None:
+            progress(result)
+        results.append(result)
+    return results
+
+
+def compare(
+    results: Sequence[Result], baseline: Dict[str, Any], threshold: float = 0.2
+) -> List[str]:
+    """Find benchmarks which got slower than in a baseline
+
+    Parameters
+    ----------
+    results : Sequence[Result]
+        The new results
+    baseline : Dict[str, Any]
+        A previous report, as written by ``--json``
+    threshold : float
+        How much lower the ops per second may be, ``0.2`` allows 20%
+
+    Returns
+    -------
+    List[str]
+        A description of every regression
+    """
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions: List[str] = []
+    for result in results:
+        before = previous.get(result.name)
+        if before is None:
+            continue
+        ratio = result.ops_per_sec / before["ops_per_sec"]
+        if ratio < 1 - threshold:
+            regressions.append(
+                f"{result.name}: {result.ops_per_sec:,.0f} ops/s, "
+                f"{1 - ratio:.0%} slower than {before['ops_per_sec']:,.0f} ops/s"
+            )
+    return regressions
+
+
+def _report(results: Sequence[Result]) -> Dict[str, Any]:
+    import discord_typings
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "discord_typings": getattr(discord_typings, "__version__", None),
+        "results": [asdict(result) for result in results],
+    }
+
+
+def _format(result: Result) -> str:
+    return (
+        f"{result.name:<24} {result.ops_per_sec:>14,.0f} ops/s"
+        f"  p50 {result.p50 * 1e6:>10,.1f}us  p99 {result.p99 * 1e6:>10,.1f}us"
+        f"  peak {result.peak_memory / 1024:>10,.0f}KiB"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m disfake.benchmark",
+        description="Benchmark the generation hot paths of disfake",
+    )
+    parser.add_argument("-k", "--filter", help="only run benchmarks matching a regex")
+    parser.add_argument(
+        "--quick", action="store_true", help="skip slow benchmarks, time briefly"
+    )
+    parser.add_argument("--min-time", type=float, default=None)
+    parser.add_argument("--json", help="write the results as JSON, - for stdout")
+    parser.add_argument("--compare", help="fail on regressions against a report")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    selected = [
+        case
+        for case in cases()
+        if not (args.quick and case.slow)
+        and (args.filter is None or re.search(args.filter, case.name))
+    ]
+    min_time = args.min_time if args.min_time is not None else 0.2 if args.quick else 1
+    # The table goes to stderr if the JSON is written to stdout
+    output = sys.stderr if args.json == "-" else sys.stdout
+    results = run(
+        selected,
+        min_time=min_time,
+        progress=lambda result: print(_format(result), file=output, flush=True),
+    )
+
+    if args.json == "-":
+        json.dump(_report(results), sys.stdout, indent=2)
+        print()
+    elif args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(_report(results), file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,800 @@
 from __future__ import annotations
 
+import abc
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+    overload,
+)
 
 from discord_typings import GuildMemberData, UserData
+from typing_extensions import Concatenate, ParamSpec, Protocol
 
+from disfake.core import stats
 from disfake.core.snowflake import Snowflake
 
-__all__ = ("users", "members", "snowflake")
+if TYPE_CHECKING:
+    from disfake.core.records import UserRecords
+
+__all__ = (
+    "users",
+    "members",
+    "snowflake",
+    "UserCache",
+    "MemberCache",
+    "MemberSequence",
+    "GuildMembers",
+    "EvictionPolicy",
+)
 
 snowflake: Snowflake = Snowflake(0, 0)  # type: Optional[Snowflake]
 
 
 @dataclass(frozen=True)
-class Key:
-    guild_id: Optional[str]
-    user_id: Optional[str]
+class EvictionPolicy:
+    """When entries are evicted from a cache
+
+    Without a ``ttl`` the least recently used entries are evicted once a
+    limit is exceeded. With a ``ttl`` entries expire ``ttl`` seconds after they
+    were last written, and the oldest entries are evicted first.
+    """
+
+    max_entries: Optional[int] = None
+    max_bytes: Optional[int] = None
+    ttl: Optional[float] = None
+    # Whether UserCache.get rebuilds evicted users from their ID, which loses
+    # the values they were generated with besides their ID. The IDs of the
+    # last max_entries, or 65536, evicted users are kept for this.
+    regenerate: bool = False
+
+
+# The most evicted user IDs kept to regenerate users without max_entries
+_MAX_EVICTED = 1 << 16
+
+
+def _sizeof(obj: object) -> int:
+    """Approximate the memory used by a payload"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in cast(Dict[object, object], obj).items():
+            size += sys.getsizeof(key) + _sizeof(value)
+    elif isinstance(obj, list):
+        size += sum(_sizeof(item) for item in cast(List[object], obj))
+    return size
+
+
+class _Evictor:
+    """Tracks the order, size and age of cache entries"""
+
+    def __init__(self, policy: EvictionPolicy) -> None:
+        self.policy = policy
+        # key -> (entries, bytes, written at)
+        self._entries: OrderedDict[str, Tuple[int, int, float]] = OrderedDict()
+        self.entries = 0
+        self.bytes = 0
+
+    def write(self, key: str, entries: int, bytes: int) -> None:
+        self.discard(key)
+        self.grow(key, entries, bytes)
+
+    def grow(self, key: str, entries: int, bytes: int, touch: bool = True) -> None:
+        """Change the size of an entry, counting it as written if ``touch``"""
+        old_entries, old_bytes, written = self._entries.pop(key, (0, 0, 0.0))
+        if touch:
+            written = time.monotonic()
+        self._entries[key] = (old_entries + entries, old_bytes + bytes, written)
+        self.entries += entries
+        self.bytes += bytes
+
+    def read(self, key: str) -> bool:
+        """Record an access, returning whether the entry is still valid"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return True
+        if self.policy.ttl is None:
+            self._entries.move_to_end(key)
+        elif time.monotonic() - entry[2] > self.policy.ttl:
+            return False
+        return True
+
+    def discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.entries -= entry[0]
+            self.bytes -= entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.entries = 0
+        self.bytes = 0
+
+    def _exceeded(self) -> bool:
+        policy = self.policy
+        return (
+            policy.max_entries is not None and self.entries > policy.max_entries
+        ) or (policy.max_bytes is not None and self.bytes > policy.max_bytes)
+
+    def evictable(self, keep: Optional[str] = None) -> Iterator[str]:
+        """Yield the keys to evict, oldest first, skipping ``keep``
+
+        Yielded keys are no longer tracked, the caller has to remove their
+        entries. Only the entries which are evicted are visited.
+        """
+        now = time.monotonic()
+        ttl = self.policy.ttl
+        entries = self._entries
+        while entries:
+            key, (_, _, written) = next(iter(entries.items()))
+            expired = ttl is not None and now - written > ttl
+            if not expired and not self._exceeded():
+                break
+            if key == keep:
+                if len(entries) == 1:
+                    break
+                # The kept entry was just written, it is the newest
+                entries.move_to_end(key)
+                continue
+            self.discard(key)
+            yield key
+
+
+class _Lockable(Protocol):
+    _lock: threading.RLock
+
+
+L = TypeVar("L", bound=_Lockable)
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+def _synchronized(
+    method: Callable[Concatenate[L, P], R]
+) -> Callable[Concatenate[L, P], R]:
+    """Hold the lock of the cache while the method runs"""
+
+    @functools.wraps(method)
+    def wrapper(self: L, *args: P.args, **kwargs: P.kwargs) -> R:
+        with self._lock:  # pyright: ignore[reportPrivateUsage]
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class _Notifier:
+    """Calls listeners with the key of every changed entry, or ``None`` once
+    every entry changed"""
+
+    def __init__(self) -> None:
+        self._listeners: List[Callable[[Optional[str]], None]] = []
 
+    def subscribe(self, listener: Callable[[Optional[str]], None]) -> None:
+        """Call ``listener`` with the key of every changed entry
+
+        The key is ``None`` once the cache is cleared.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Optional[str]], None]) -> None:
+        self._listeners.remove(listener)
+
+    def _notify(self, key: Optional[str]) -> None:
+        for listener in self._listeners:
+            listener(key)
+
+
+class UserCache(_Notifier):
+    """Users keyed by their ID
+
+    Parameters
+    ----------
+    policy : Optional[EvictionPolicy]
+        When to evict users, by default users are never evicted
+    source : Optional[Mapping[str, UserData]]
+        Users which are read on first access, such as the users of a
+        :class:`~disfake.snapshot.Snapshot`. Users read from the source are
+        added to the cache.
+
+    Users added with :meth:`add_ids` are stored as
+    :class:`~disfake.core.records.UserRecords` and are never evicted.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[EvictionPolicy] = None,
+        source: Optional[Mapping[str, UserData]] = None,
+    ) -> None:
+        super().__init__()
+        self._users: Dict[str, UserData] = {}
+        self._source = source
+        # Users of the source which were removed from the cache
+        self._removed: Set[str] = set()
+        # Users which were evicted, to be regenerated by get
+        self._evicted: OrderedDict[int, None] = OrderedDict()
+        self._records: Optional[UserRecords] = None
+        self._evictor: Optional[_Evictor] = None
+        self._lock = threading.RLock()
+        self.configure(policy)
+
+    @_synchronized
+    def configure(self, policy: Optional[EvictionPolicy]) -> None:
+        """Change the eviction policy, evicting users if needed"""
+        self.policy = policy
+        self._evictor = None if policy is None else _Evictor(policy)
+        if policy is None or not policy.regenerate:
+            self._evicted.clear()
+        if self._evictor is not None:
+            for user_id, user in self._users.items():
+                self._evictor.write(user_id, 1, _sizeof(user))
+            self._evict()
 
-class UserCache(Dict[Key, UserData]):
     def add(self, user: UserData) -> None:
-        key = Key(None, user["id"])
-        self[key] = user
+        if stats.enabled:
+            stats.record_count("users.add")
+        if self._removed:
+            self._removed.discard(user["id"])
+        if self._evicted and user["id"].isdigit():
+            self._evicted.pop(int(user["id"]), None)
+        if self._records and user["id"].isdigit():
+            # The user replaces its record
+            self._records.discard(int(user["id"]))
+        if self._listeners:
+            self._notify(user["id"])
+        if self._evictor is None:
+            self._users[user["id"]] = user
+            return
+
+        with self._lock:
+            self._users[user["id"]] = user
+            self._evictor.write(user["id"], 1, _sizeof(user))
+            self._evict(keep=user["id"])
+
+    @_synchronized
+    def add_ids(self, ids: Iterable[int]) -> None:
+        """Add the users derived from snowflakes, storing only their IDs
+
+        The users are rendered with :func:`~disfake.core.records.user` on every
+        read, and replace cached users with the same IDs.
+        """
+        ids = ids if isinstance(ids, Sequence) else list(ids)
+        if stats.enabled:
+            stats.record_count("users.add", len(ids))
+        if self._users or self._removed or self._listeners:
+            for id in map(str, ids):
+                self._removed.discard(id)
+                if self._discard(id) is not None or self._listeners:
+                    self._notify(id)
+        self.records.extend(ids)
+
+    @property
+    def records(self) -> UserRecords:
+        """The users added with :meth:`add_ids`"""
+        if self._records is None:
+            from disfake.core.records import UserRecords
+
+            self._records = UserRecords()
+        return self._records
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        assert self._evictor is not None
+        for user_id in self._evictor.evictable(keep):
+            # Evicted users of the source are read from it again
+            self._evict_user(user_id)
+
+    def _evict_user(self, user_id: str) -> None:
+        self._discard(user_id)
+        if self._listeners:
+            self._notify(user_id)
+        policy = self.policy
+        if policy is not None and policy.regenerate and user_id.isdigit():
+            # Only the most recently evicted users are remembered
+            self._evicted[int(user_id)] = None
+            if len(self._evicted) > (policy.max_entries or _MAX_EVICTED):
+                self._evicted.popitem(last=False)
 
     def get(self, user_id: str) -> Optional[UserData]:
-        key = Key(None, user_id)
-        return super().get(key)
+        if self._evictor is None:
+            user = self._users.get(user_id)
+            if user is None and self._records:
+                user = self._records.get(user_id)
+            if user is None and self._source is not None:
+                return self._read_source(user_id)
+            return user
+
+        with self._lock:
+            return self._get_evictable(user_id)
+
+    def _read_source(self, user_id: str) -> Optional[UserData]:
+        assert self._source is not None
+        if user_id in self._removed:
+            return None
+        user = self._source.get(user_id)
+        if user is not None:
+            self.add(user)
+        return user
+
+    def _get_evictable(self, user_id: str) -> Optional[UserData]:
+        assert self._evictor is not None
+        user = self._users.get(user_id)
+        if user is not None and not self._evictor.read(user_id):
+            self._evict_user(user_id)
+            user = None
+        if user is None and self._records:
+            user = self._records.get(user_id)
+        if user is None and self._source is not None:
+            user = self._read_source(user_id)
+        if (
+            user is None
+            and self._evicted
+            and user_id.isdigit()
+            and int(user_id) in self._evicted
+        ):
+            # Evicted users are rebuilt, which works because users are
+            # derived from their snowflake
+            from disfake.http.user import from_id
+
+            user = from_id(int(user_id))
+            self.add(user)
+        return user
+
+    def _discard(self, user_id: str) -> Optional[UserData]:
+        if self._evictor is not None:
+            self._evictor.discard(user_id)
+        return self._users.pop(user_id, None)
+
+    @_synchronized
+    def remove(self, user_id: str) -> Optional[UserData]:
+        user = self._discard(user_id)
+        if self._evicted and user_id.isdigit():
+            self._evicted.pop(int(user_id), None)
+        if self._records and user_id in self._records:
+            user = user or self._records[user_id]
+            self._records.discard(int(user_id))
+        if self._source is not None and user_id in self._source:
+            if user is None and user_id not in self._removed:
+                user = self._source[user_id]
+            self._removed.add(user_id)
+        if self._listeners:
+            self._notify(user_id)
+        return user
+
+    @_synchronized
+    def clear(self) -> None:
+        self._users.clear()
+        self._records = None
+        self._source = None
+        self._removed.clear()
+        self._evicted.clear()
+        if self._evictor is not None:
+            self._evictor.clear()
+        self._notify(None)
+
+    def __len__(self) -> int:
+        if self._source is None:
+            return len(self._users) + (len(self._records) if self._records else 0)
+        # Counting the users of a source is O(n)
+        return sum(1 for _ in self)
+
+    def __contains__(self, user_id: object) -> bool:
+        if user_id in self._users:
+            return True
+        if self._records and user_id in self._records:
+            return True
+        if (
+            self._evicted
+            and isinstance(user_id, str)
+            and user_id.isdigit()
+            and int(user_id) in self._evicted
+        ):
+            # Evicted users are regenerated by get
+            return True
+        return (
+            self._source is not None
+            and user_id in self._source
+            and user_id not in self._removed
+        )
+
+    @_synchronized
+    def sizeof(self) -> int:
+        """Approximate the bytes of the stored users
+
+        Unlike reading the users, this neither decodes users of the source nor
+        expires users or changes their order of eviction. Records count 8
+        bytes per ID.
+        """
+        size = sum(map(_sizeof, self._users.values()))
+        if self._records:
+            size += len(self._records) * _RECORD_BYTES
+        return size
+
+    def __iter__(self) -> Iterator[str]:
+        if self._source is None and not self._records:
+            return iter(self._users)
+        return self._iter_all()
+
+    def _iter_all(self) -> Iterator[str]:
+        yield from self._users
+        if self._records:
+            yield from self._records
+        if self._source is None:
+            return
+        for user_id in self._source:
+            if user_id not in self._users and user_id not in self._removed:
+                yield user_id
 
 
-class MemberCache(Dict[Key, List[GuildMemberData]]):
+class MemberSequence(Sequence[GuildMemberData]):
+    """The members of a guild, as stored in :class:`MemberCache`"""
+
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def find(self, user_id: str) -> Optional[GuildMemberData]:
+        """Get the member of a user, or ``None`` if the user is not a member"""
+
+    @abc.abstractmethod
+    def user_ids(self) -> Iterator[str]:
+        """Iterate over the IDs of the members"""
+
+
+class GuildMembers(MemberSequence):
+    """Members indexed by their user ID
+
+    Removing a member moves the last member into its place.
+    """
+
+    __slots__ = ("_members", "_index")
+
+    def __init__(self) -> None:
+        self._members: List[GuildMemberData] = []
+        self._index: Dict[str, int] = {}
+
+    def append(self, member: GuildMemberData, user_id: Optional[str] = None) -> None:
+        if user_id is None:
+            user_id = _user_id(member)
+        if user_id in self._index:
+            self._members[self._index[user_id]] = member
+            return
+        self._index[user_id] = len(self._members)
+        self._members.append(member)
+
+    def remove(self, user_id: str) -> Optional[GuildMemberData]:
+        index = self._index.pop(user_id, None)
+        if index is None:
+            return None
+
+        member = self._members[index]
+        last = self._members.pop()
+        if index < len(self._members):
+            self._members[index] = last
+            self._index[_user_id(last)] = index
+        return member
+
+    def find(self, user_id: str) -> Optional[GuildMemberData]:
+        index = self._index.get(user_id)
+        return None if index is None else self._members[index]
+
+    def user_ids(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    @overload
+    def __getitem__(self, index: int) -> GuildMemberData:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[GuildMemberData]:
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[GuildMemberData, List[GuildMemberData]]:
+        return self._members[index]
+
+    def __iter__(self) -> Iterator[GuildMemberData]:
+        return iter(self._members)
+
+
+# The bytes of a member stored as a record, an unsigned 64 bit user ID
+_RECORD_BYTES = 8
+
+
+def _sizeof_members(members: MemberSequence) -> Tuple[int, int]:
+    """The entries and approximate bytes a guild counts towards cache limits"""
+    from disfake.core.records import MemberRecords
+
+    if isinstance(members, GuildMembers):
+        return len(members), sum(_sizeof(member) for member in members)
+    if isinstance(members, MemberRecords):
+        # The array of user IDs is not part of sys.getsizeof of the records
+        return 0, sys.getsizeof(members) + len(members) * _RECORD_BYTES
+    # Other sequences build their members on access and only cost themselves
+    return 0, _sizeof(members)
+
+
+def _user_id(member: GuildMemberData) -> str:
+    user = member.get("user")
+    assert user is not None, "Cached members need a user"
+    return user["id"]
+
+
+class MemberCache(_Notifier):
+    """Guild members keyed by guild ID, and then by user ID
+
+    Besides the members of every guild, the guilds of every user are indexed,
+    including guilds stored as :class:`~disfake.core.records.MemberRecords`.
+    Guilds stored as another :class:`MemberSequence`, such as
+    :class:`~disfake.http.guild.LazyMembers`, are not part of that index and
+    are searched instead.
+
+    Parameters
+    ----------
+    policy : Optional[EvictionPolicy]
+        When to evict guilds, by default guilds are never evicted. Whole guilds
+        are evicted, and ``max_entries`` counts the members of all guilds.
+    """
+
+    def __init__(self, policy: Optional[EvictionPolicy] = None) -> None:
+        super().__init__()
+        self._guilds: Dict[str, MemberSequence] = {}
+        self._user_guilds: Dict[str, Set[str]] = {}
+        # User ID -> guilds whose members are stored as MemberRecords
+        self._record_guilds: Dict[int, Set[str]] = {}
+        # Guilds which are neither GuildMembers nor records and are searched
+        self._external: Set[str] = set()
+        self._evictor: Optional[_Evictor] = None
+        self._lock = threading.RLock()
+        self.configure(policy)
+
+    @_synchronized
+    def configure(self, policy: Optional[EvictionPolicy]) -> None:
+        """Change the eviction policy, evicting guilds if needed"""
+        self.policy = policy
+        self._evictor = None if policy is None else _Evictor(policy)
+        if self._evictor is not None:
+            for id, members in self._guilds.items():
+                self._evictor.write(id, *_sizeof_members(members))
+            self._evict()
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        assert self._evictor is not None
+        for id in self._evictor.evictable(keep):
+            self.remove_guild(id)
+
+    @_synchronized
     def add(self, id: str, member: GuildMemberData) -> None:
-        key = Key(id, None)
-        if key not in self:
-            self[key] = []
-        self[key].append(member)
-
-    def get(self, id: str) -> Optional[List[GuildMemberData]]:
-        key = Key(id, None)
-        return super().get(key)
+        members = self._guilds.get(id)
+        if not isinstance(members, GuildMembers):
+            # Other member sequences are materialized once members are added
+            members = self._index(id, members or ())
+
+        if stats.enabled:
+            stats.record_count("members.add")
+        user_id = _user_id(member)
+        members.append(member, user_id)
+        self._user_guilds.setdefault(user_id, set()).add(id)
+        if self._listeners:
+            self._notify(id)
+        if self._evictor is not None:
+            self._evictor.grow(id, 1, _sizeof(member))
+            self._evict(keep=id)
+
+    @_synchronized
+    def set(self, id: str, members: Sequence[GuildMemberData]) -> None:
+        from disfake.core.records import MemberRecords
+
+        self.remove_guild(id)
+        if isinstance(members, MemberSequence) and not isinstance(
+            members, GuildMembers
+        ):
+            self._guilds[id] = members
+            if isinstance(members, MemberRecords):
+                self._index_records(id, members.ids())
+            else:
+                self._external.add(id)
+            if self._evictor is not None:
+                self._evictor.write(id, *_sizeof_members(members))
+                self._evict(keep=id)
+        else:
+            self._index(id, members)
+        if stats.enabled:
+            stats.record_count("members.add", len(members))
+        if self._listeners:
+            self._notify(id)
+
+    @_synchronized
+    def add_ids(self, id: str, user_ids: Iterable[int]) -> None:
+        """Add the members of the users derived from snowflakes
+
+        Guilds without members store them as
+        :class:`~disfake.core.records.MemberRecords`, which only hold the user
+        IDs. Guilds stored otherwise get the rendered members added.
+        """
+        from disfake.core import records
+
+        members = self._guilds.get(id)
+        if members is None:
+            self.set(id, records.MemberRecords(id, user_ids))
+            return
+        if not isinstance(members, records.MemberRecords):
+            for user_id in user_ids:
+                self.add(id, records.member(records.user(user_id), id))
+            return
+
+        user_ids = user_ids if isinstance(user_ids, Sequence) else list(user_ids)
+        members.extend(user_ids)
+        self._index_records(id, user_ids)
+        if stats.enabled:
+            stats.record_count("members.add", len(user_ids))
+        if self._listeners:
+            self._notify(id)
+        if self._evictor is not None:
+            self._evictor.write(id, *_sizeof_members(members))
+            self._evict(keep=id)
+
+    def _index_records(self, id: str, user_ids: Iterable[int]) -> None:
+        record_guilds = self._record_guilds
+        for user_id in user_ids:
+            if user_id in record_guilds:
+                record_guilds[user_id].add(id)
+            else:
+                record_guilds[user_id] = {id}
+
+    def _unindex_records(self, id: str, user_ids: Iterable[int]) -> None:
+        record_guilds = self._record_guilds
+        for user_id in user_ids:
+            guilds = record_guilds.get(user_id)
+            if guilds is not None:
+                guilds.discard(id)
+                if not guilds:
+                    del record_guilds[user_id]
+
+    def _index(self, id: str, members: Sequence[GuildMemberData]) -> GuildMembers:
+        self.remove_guild(id)
+        indexed = self._guilds[id] = GuildMembers()
+        user_guilds = self._user_guilds
+        for member in members:
+            user_id = _user_id(member)
+            indexed.append(member, user_id)
+            if user_id in user_guilds:
+                user_guilds[user_id].add(id)
+            else:
+                user_guilds[user_id] = {id}
+
+        if self._evictor is not None:
+            self._evictor.write(id, *_sizeof_members(indexed))
+            self._evict(keep=id)
+        return indexed
+
+    def _read(self, id: str) -> Optional[MemberSequence]:
+        members = self._guilds.get(id)
+        if members is not None and self._evictor is not None:
+            with self._lock:
+                if not self._evictor.read(id):
+                    self.remove_guild(id)
+                    return None
+        return members
+
+    def get(self, id: str) -> Optional[MemberSequence]:
+        return self._read(id)
+
+    def member(self, id: str, user_id: str) -> Optional[GuildMemberData]:
+        """Get a member of a guild, or ``None`` if the user is not a member"""
+        members = self._read(id)
+        return None if members is None else members.find(user_id)
+
+    def guilds_of(self, user_id: str) -> Set[str]:
+        """Get the IDs of the guilds a user is a member of"""
+        guilds = set(self._user_guilds.get(user_id, ()))
+        if self._record_guilds and user_id.isdigit():
+            guilds.update(self._record_guilds.get(int(user_id), ()))
+        for id in self._external:
+            if self._guilds[id].find(user_id) is not None:
+                guilds.add(id)
+        return guilds
+
+    @_synchronized
+    def remove(self, id: str, user_id: str) -> Optional[GuildMemberData]:
+        """Remove a member from a guild, returning the removed member"""
+        from disfake.core.records import MemberRecords
+        from disfake.http.guild import LazyMembers
+
+        members = self._guilds.get(id)
+        if members is None:
+            return None
+        if isinstance(members, (MemberRecords, LazyMembers)):
+            # Members stored as IDs are not materialized to remove a member
+            member = members.find(user_id)
+            if member is not None:
+                size = _sizeof_members(members)[1]
+                members.discard(int(user_id))
+                if isinstance(members, MemberRecords):
+                    self._unindex_records(id, (int(user_id),))
+                if self._listeners:
+                    self._notify(id)
+                if self._evictor is not None:
+                    size = _sizeof_members(members)[1] - size
+                    self._evictor.grow(id, 0, size, touch=False)
+            return member
+        if not isinstance(members, GuildMembers):
+            members = self._index(id, members)
+
+        member = members.remove(user_id)
+        if member is not None:
+            if self._listeners:
+                self._notify(id)
+            if self._evictor is not None:
+                self._evictor.grow(id, -1, -_sizeof(member), touch=False)
+            guilds = self._user_guilds[user_id]
+            guilds.discard(id)
+            if not guilds:
+                del self._user_guilds[user_id]
+        return member
+
+    @_synchronized
+    def remove_guild(self, id: str) -> Optional[MemberSequence]:
+        """Remove all members of a guild"""
+        from disfake.core.records import MemberRecords
+
+        members = self._guilds.pop(id, None)
+        self._external.discard(id)
+        if members is not None and self._listeners:
+            self._notify(id)
+        if self._evictor is not None:
+            self._evictor.discard(id)
+        if isinstance(members, GuildMembers):
+            for user_id in members.user_ids():
+                guilds = self._user_guilds[user_id]
+                guilds.discard(id)
+                if not guilds:
+                    del self._user_guilds[user_id]
+        elif isinstance(members, MemberRecords):
+            self._unindex_records(id, members.ids())
+        return members
+
+    @_synchronized
+    def clear(self) -> None:
+        self._guilds.clear()
+        self._user_guilds.clear()
+        self._record_guilds.clear()
+        self._external.clear()
+        if self._evictor is not None:
+            self._evictor.clear()
+        self._notify(None)
+
+    @_synchronized
+    def sizeof(self) -> int:
+        """Approximate the bytes of the stored members, like
+        :meth:`UserCache.sizeof` without reading the guilds"""
+        return sum(_sizeof_members(members)[1] for members in self._guilds.values())
+
+    def __len__(self) -> int:
+        return len(self._guilds)
+
+    def __contains__(self, id: object) -> bool:
+        return id in self._guilds
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._guilds)
 
 
 users: UserCache = UserCache()
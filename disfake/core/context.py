@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import contextlib
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from random import Random
+from typing import ContextManager, Generator, Optional, Union
+
+from disfake.core import cache
+from disfake.core.cache import MemberCache, UserCache
+from disfake.core.snowflake import Snowflake
+
+__all__ = ("GenerationContext", "GLOBAL", "SEEDED_NOW", "current", "use", "isolated")
+
+
+# The latest fixed clock of seeded contexts, 2022-01-01T00:00:00+00:00
+SEEDED_NOW = 1640995200.0
+
+# Seeded clocks are moved back by a whole amount of hours derived from the
+# seed, up to four years
+_SEED_STEP = 60 * 60
+_SEED_STEPS = 4 * 365 * 24
+
+
+@dataclass
+class GenerationContext:
+    """The snowflake generator, random generator and caches used while
+    generating objects"""
+
+    snowflake: Snowflake = field(default_factory=lambda: Snowflake(0, 0))
+    users: UserCache = field(default_factory=UserCache)
+    members: MemberCache = field(default_factory=MemberCache)
+    random: Random = field(default_factory=Random)
+
+    @classmethod
+    def seeded(
+        cls,
+        seed: Union[int, str],
+        now: Optional[float] = None,
+        worker: Union[int, str] = 0,
+        process: Union[int, str] = 0,
+    ) -> GenerationContext:
+        """Create a reproducible context
+
+        The random generators are seeded with ``seed`` and the snowflake
+        generator uses ``now`` as a fixed clock, so generating the same objects
+        in the same order always results in identical objects.
+
+        By default the clock is an hour up to four years before
+        :data:`SEEDED_NOW`, picked by ``seed``. Contexts with different seeds
+        thus issue different snowflakes, unless one of them issues billions.
+        """
+        if now is None:
+            now = SEEDED_NOW - Random(seed).randrange(_SEED_STEPS) * _SEED_STEP
+        snowflake = Snowflake(worker, process, now=now, seed=seed)
+        return cls(snowflake, random=Random(seed))
+
+
+GLOBAL = GenerationContext(cache.snowflake, cache.users, cache.members)
+"""The global context, made of :attr:`disfake.core.cache.snowflake`,
+:attr:`disfake.core.cache.users` and :attr:`disfake.core.cache.members`"""
+
+_current: ContextVar[GenerationContext] = ContextVar("disfake_context", default=GLOBAL)
+
+
+def current() -> GenerationContext:
+    """Get the context of the running thread or task
+
+    Returns
+    -------
+    GenerationContext
+        The active context, :data:`GLOBAL` if none was set
+    """
+    return _current.get()
+
+
+@contextlib.contextmanager
+def use(context: GenerationContext) -> Generator[GenerationContext, None, None]:
+    """Make ``context`` the active context until the block exits
+
+    Like any :class:`~contextvars.ContextVar`, the context is inherited by
+    asyncio tasks created inside the block, but not by new threads.
+    """
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+
+def isolated(
+    worker: Union[int, str] = 0,
+    process: Union[int, str] = 0,
+    *,
+    seed: Optional[Union[int, str]] = None,
+) -> ContextManager[GenerationContext]:
+    """Use a fresh context with its own snowflake generator and caches
+
+    Give every isolated context a distinct ``worker`` and ``process`` if the
+    IDs it generates must not collide with the IDs of other contexts. With a
+    ``seed`` the context is created by :meth:`GenerationContext.seeded`.
+    """
+    if seed is not None:
+        return use(GenerationContext.seeded(seed, worker=worker, process=process))
+    return use(GenerationContext(Snowflake(worker, process)))
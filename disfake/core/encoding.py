@@ -0,0 +1,236 @@
+"""Encode payloads to JSON once and reuse the bytes
+
+Fake gateways and HTTP endpoints often send the same payloads many times.
+:class:`PayloadCache` keeps the encoded bytes of such payloads until one of the
+entities they were built from changes in the caches of a
+:class:`~disfake.core.context.GenerationContext`. Gateway events are stored as
+:class:`EncodedEvent`, which splices the sequence number into the cached bytes.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
+
+from discord_typings import GuildData, UserData
+
+from disfake.core import context
+from disfake.core.context import GenerationContext
+
+__all__ = ("dumps", "EncodedEvent", "PayloadCache")
+
+
+def _default(obj: object) -> Any:
+    # Views and lazy sequences, such as GuildCreateView and LazyMembers
+    if isinstance(obj, Mapping):
+        return dict(cast(Mapping[str, Any], obj))
+    if isinstance(obj, Sequence):
+        return list(cast(Sequence[Any], obj))
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), default=_default)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a payload as compact JSON
+
+    Besides the types supported by :mod:`json`, any mapping or sequence is
+    encoded, so views and lazy member sequences do not have to be copied first.
+    """
+    return _encoder.encode(obj).encode("utf-8")
+
+
+class EncodedEvent:
+    """A gateway event encoded without its sequence number
+
+    The ``s`` field is appended to the cached bytes on every send instead of
+    encoding the event again.
+
+    Parameters
+    ----------
+    event : Mapping[str, Any]
+        The event to encode, its ``s`` field is ignored
+    """
+
+    __slots__ = ("_head",)
+
+    def __init__(self, event: Mapping[str, Any]) -> None:
+        encoded = dumps({key: value for key, value in event.items() if key != "s"})
+        # Reopen the object to append "s" as its last field
+        self._head = encoded[:-1] + (b',"s":' if len(encoded) > 2 else b'"s":')
+
+    def encode(self, s: Optional[int] = None) -> bytes:
+        """Get the encoded event with the sequence number ``s``"""
+        return self._head + (b"null}" if s is None else b"%d}" % s)
+
+    def __len__(self) -> int:
+        """The length of the event without its sequence number"""
+        return len(self._head) + 1
+
+
+_Entry = Tuple[Any, Set[str]]
+
+
+class PayloadCache:
+    """Encoded payloads, dropped once the entities they depend on change
+
+    Every payload is stored under a key together with the IDs of the users
+    and guilds it depends on. Changes to those users or guild members in the
+    caches of ``ctx`` drop the payload. Other changes, such as mutating a
+    guild object, have to be reported with :meth:`invalidate`.
+
+    Parameters
+    ----------
+    ctx : Optional[GenerationContext]
+        The context to watch, by default the current context
+    """
+
+    def __init__(self, ctx: Optional[GenerationContext] = None) -> None:
+        self.context = ctx or context.current()
+        self._entries: Dict[Hashable, _Entry] = {}
+        # Entity ID -> keys of the payloads depending on it
+        self._dependents: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.context.users.subscribe(self._changed)
+        self.context.members.subscribe(self._changed)
+
+    def close(self) -> None:
+        """Stop watching the caches of the context"""
+        self.context.users.unsubscribe(self._changed)
+        self.context.members.unsubscribe(self._changed)
+
+    def _changed(self, id: Optional[str]) -> None:
+        if id is None:
+            self.clear()
+        elif id in self._dependents:
+            self.invalidate(id)
+
+    def _get(
+        self,
+        key: Hashable,
+        build: Callable[[], Any],
+        encode: Callable[[Any], Any],
+        depends: Iterable[str],
+    ) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry[0]
+
+        encoded = encode(build())
+        ids = set(depends)
+        with self._lock:
+            self._entries[key] = (encoded, ids)
+            for id in ids:
+                self._dependents.setdefault(id, set()).add(key)
+        return encoded
+
+    def get(
+        self, key: Hashable, build: Callable[[], Any], depends: Iterable[str] = ()
+    ) -> bytes:
+        """Get the encoded payload stored under ``key``
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the payload
+        build : Callable[[], Any]
+            Builds the payload if it is not cached
+        depends : Iterable[str]
+            The IDs of the users and guilds the payload is built from
+
+        Returns
+        -------
+        bytes
+            The payload encoded by :func:`dumps`
+        """
+        return self._get(key, build, dumps, depends)
+
+    def event(
+        self,
+        key: Hashable,
+        build: Callable[[], Mapping[str, Any]],
+        depends: Iterable[str] = (),
+    ) -> EncodedEvent:
+        """Like :meth:`get`, but for gateway events"""
+        return self._get(key, build, EncodedEvent, depends)
+
+    def user(self, user_id: str) -> bytes:
+        """Get an encoded user of the user cache"""
+
+        def build() -> UserData:
+            user = self.context.users.get(user_id)
+            if user is None:
+                raise KeyError(user_id)
+            return user
+
+        return self.get(("user", user_id), build, (user_id,))
+
+    def guild(self, guild: GuildData) -> bytes:
+        """Get an encoded guild, call :meth:`invalidate` after changing it"""
+        return self.get(("guild", guild["id"]), lambda: guild, (guild["id"],))
+
+    def guild_create(
+        self, guild: GuildData, include_members: bool = False
+    ) -> EncodedEvent:
+        """Get the encoded ``GUILD_CREATE`` event of a guild
+
+        See :func:`~disfake.gateway.promotors.guild_create_view`.
+        """
+        from disfake.gateway.promotors import guild_create_view
+
+        def build() -> Mapping[str, Any]:
+            with context.use(self.context):
+                view = guild_create_view(guild, include_members)
+            return {"op": 0, "t": "GUILD_CREATE", "d": view}
+
+        key = ("guild_create", guild["id"], include_members)
+        return self.event(key, build, (guild["id"],))
+
+    def ready(self, user: UserData) -> EncodedEvent:
+        """Get the encoded ``READY`` event of a user
+
+        See :func:`~disfake.gateway.events.ready`.
+        """
+        from disfake.gateway import events
+
+        def build() -> Mapping[str, Any]:
+            with context.use(self.context):
+                return events.ready(user)
+
+        return self.event(("ready", user["id"]), build, (user["id"],))
+
+    def invalidate(self, id: str) -> None:
+        """Drop the payloads depending on the user or guild with the ID ``id``"""
+        with self._lock:
+            for key in self._dependents.pop(id, ()):
+                entry = self._entries.pop(key, None)
+                if entry is None:
+                    continue
+                for other in entry[1]:
+                    if other != id:
+                        self._dependents[other].discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dependents.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
@@ -1,17 +1,25 @@
 from __future__ import annotations
 
-import contextlib
+import ast
+import functools
 import importlib
+import importlib.util
 import inspect
-import random
+import sys
+import threading
+import time
 import typing
 from types import ModuleType
 from typing import (
+    AbstractSet,
     Any,
+    Callable,
     Dict,
-    Generic,
+    FrozenSet,
+    Iterator,
     List,
     Literal,
+    Mapping,
     Optional,
     Sequence,
     Tuple,
@@ -19,11 +27,14 @@ from typing import (
     TypeVar,
     Union,
     cast,
+    overload,
 )
 
 import typing_extensions
 from typing_extensions import NotRequired, TypedDict
 
+from disfake.core import context, schema, stats
+
 T = TypeVar("T")
 TD = TypeVar("TD", bound=TypedDict)
 
@@ -34,122 +45,435 @@ class _Missing:
 
 MISSING = _Missing()
 
+# Guards the type hint and factory caches while they are being filled
+_lock = threading.RLock()
+
 
-def _resolve_bases(cls: type) -> List[type]:
-    _get_globals(inspect.getmodule(cls))
-    return cls.__orig_bases__  # type: ignore
+class _LazyNamespace(Dict[str, Any]):
+    """Namespace used as ``localns`` when evaluating string annotations
+
+    Names that a module only imports under ``if TYPE_CHECKING:`` are imported
+    the first time an annotation asks for them, instead of re-executing the
+    module. Any other name raises :class:`KeyError`, which makes ``eval`` fall
+    back to the module globals.
+    """
+
+    def __init__(
+        self, modules: Sequence[ModuleType], overrides: Dict[str, Any]
+    ) -> None:
+        super().__init__(overrides)
+        self.modules = modules
+
+    def __missing__(self, name: str) -> Any:
+        for module in self.modules:
+            target = _get_type_checking_imports(module).get(name)
+            if target is not None:
+                value = self[name] = _import(*target)
+                return value
+        raise KeyError(name)
+
+
+def _is_type_checking(node: ast.expr) -> bool:
+    if isinstance(node, ast.Name):
+        return node.id == "TYPE_CHECKING"
+    return isinstance(node, ast.Attribute) and node.attr == "TYPE_CHECKING"
+
+
+type_checking_imports: Dict[ModuleType, Dict[str, Tuple[str, Optional[str]]]] = {}
+
+
+def _get_type_checking_imports(
+    module: ModuleType,
+) -> Dict[str, Tuple[str, Optional[str]]]:
+    """Map the names bound under ``if TYPE_CHECKING:`` to ``(module, attribute)``"""
+    if stats.enabled:
+        stats.record_cache("type_checking_imports", module in type_checking_imports)
+    if module in type_checking_imports:
+        return type_checking_imports[module]
+
+    imports: Dict[str, Tuple[str, Optional[str]]] = {}
+    try:
+        tree = ast.parse(inspect.getsource(module))
+    except (OSError, TypeError, SyntaxError):
+        # No source available, there is nothing we can resolve lazily
+        tree = ast.Module(body=[], type_ignores=[])
+
+    for node in tree.body:
+        if not (isinstance(node, ast.If) and _is_type_checking(node.test)):
+            continue
+        for statement in node.body:
+            if isinstance(statement, ast.Import):
+                for alias in statement.names:
+                    if alias.asname:
+                        imports[alias.asname] = (alias.name, None)
+                    else:
+                        name = alias.name.partition(".")[0]
+                        imports[name] = (name, None)
+            elif isinstance(statement, ast.ImportFrom):
+                source = importlib.util.resolve_name(
+                    "." * statement.level + (statement.module or ""),
+                    module.__package__ or module.__name__,
+                )
+                for alias in statement.names:
+                    imports[alias.asname or alias.name] = (source, alias.name)
+
+    type_checking_imports[module] = imports
+    return imports
+
+
+def _import(module_name: str, attribute: Optional[str]) -> Any:
+    module = importlib.import_module(module_name)
+    if attribute is None:
+        return module
+    try:
+        return getattr(module, attribute)
+    except AttributeError:
+        # `from package import submodule`
+        return importlib.import_module(f"{module_name}.{attribute}")
+
+
+def _annotation_modules(origin: type) -> List[ModuleType]:
+    # TypedDicts flatten their bases, but the annotations remember where they
+    # were defined
+    names = [origin.__module__]
+    for value in getattr(origin, "__annotations__", {}).values():
+        name = getattr(value, "__forward_module__", None)
+        if name is not None and name not in names:
+            names.append(name)
+    return [sys.modules[name] for name in names if name in sys.modules]
+
+
+type_hints: Dict[Any, Dict[str, Any]] = {}
 
 
 def _get_type_hints(type_: Type[Any]) -> Dict[str, Any]:
-    # I'm not really sure as to if there is a better way to do this
+    if stats.enabled:
+        stats.record_cache("type_hints", type_ in type_hints)
+    if type_ in type_hints:
+        return type_hints[type_]
 
     origin: Optional[type] = typing.get_origin(type_)
 
     if origin is None:
         origin = type_
 
-    module = inspect.getmodule(origin)
-    if Generic not in origin.__bases__:
-        globals_ = _get_globals(module)
-    else:
-        globals_ = _get_generic_globals(type_, origin, module)
+    # Parametrized generics resolve their TypeVars by name
+    parameters: Tuple[TypeVar, ...] = getattr(origin, "__parameters__", ())
+    mapping: Dict[Any, Any] = dict(zip(parameters, typing.get_args(type_)))
+    overrides = {parameter.__name__: arg for parameter, arg in mapping.items()}
 
-    return typing.get_type_hints(origin, globals_)
+    with _lock:
+        namespace = _LazyNamespace(_annotation_modules(origin), overrides)
+        # include_extras keeps NotRequired around on Python 3.11+
+        hints = typing_extensions.get_type_hints(
+            origin, None, namespace, include_extras=True
+        )
+        hints = {key: mapping.get(value, value) for key, value in hints.items()}
+        type_hints[type_] = hints
+    return hints
 
 
-def _get_generic_globals(type_: type, origin: type, module: Optional[ModuleType]):
-    bases = _resolve_bases(origin)  # Find the bases of the class
-    generic = next(base for base in bases if typing.get_origin(base) is Generic)
-    # Get the Generic[...] base
-    args: Tuple[TypeVar, ...] = typing.get_args(
-        generic
-    )  # Find the TypeVars in the Generic
-    mapping = dict(zip(args, typing.get_args(type_)))
-    names: Dict[str, TypeVar] = {arg.__name__: mapping[arg] for arg in args}
-    globals_ = _get_globals(module)
+def not_required(type_: Type[Any]) -> bool:
+    # Check if type is NotRequired
+    return typing_extensions.get_origin(type_) is NotRequired
 
-    for key, value in globals_.items():
-        with contextlib.suppress(TypeError):
-            if isinstance(value, TypeVar):
-                globals_[key] = names[value.__name__]
-    return globals_
 
+def optional(type_: Type[Any]) -> bool:
+    # Check if type is Optional
+    return type(None) in typing_extensions.get_args(type_)
 
-cache: Dict[ModuleType, Dict[str, Any]] = {}
 
+def _generate_primitive(type_: Type[T]) -> T:
+    return type_()
 
-def _get_globals(module: Optional[ModuleType]):
-    if module:
 
-        if module in cache:
-            return cache[module]
+def _generate_list(key: str, type_: Type[T]) -> List[T]:
 
-        # Because it is already initialized we can now set typing.TYPE_CHECKING to True
-        typing.TYPE_CHECKING = True
+    return []
 
-        try:
-            importlib.reload(module)
-            # Reload it, which allows all the imports to be reevaluated
-        finally:
-            typing.TYPE_CHECKING = False
 
-        cache[module] = module.__dict__
-    # If we would not do this there would be missing globals that are needed to evaluate the type hints
-    # This is only needed because of potential `from __future__ import annotations` imports
-    return module.__dict__
+def _generate_none() -> None:
+    return None
 
 
-def not_required(type_: Type[Any]) -> bool:
-    # Check if type is NotRequired
-    return typing_extensions.get_origin(type_) is NotRequired
+def _generate_choice(population: Sequence[T]) -> T:
+    return context.current().random.choice(population)
 
 
-def optional(type_: Type[Any]) -> bool:
-    # Check if type is Optional
-    return type(None) in typing_extensions.get_args(type_)
+def _generate_choices(population: Sequence[T], n: int) -> List[T]:
+    return context.current().random.choices(population, k=n)
 
 
-def _generate_primitive(type_: Type[T]) -> T:
-    return type_()
+# How a single field is generated, as a (kind, payload) pair. Kinds are
+# "typeddict", "primitive", "literal", "none", "list" and "dict".
+FieldSpec = Tuple[str, Any]
 
 
-def _generate_list(key: str, type_: Type[T]) -> List[T]:
+class _Factory:
+    """A generator specialized for a single TypedDict
+
+    The field layout, the Literal choices, the nested factories and the
+    required keys are resolved once by :func:`_compile` and reused for every
+    object built afterwards.
+    """
+
+    __slots__ = ("type_", "specs", "fields", "producers", "columns", "required_keys")
+
+    def __init__(self, type_: Any) -> None:
+        self.type_ = type_
+        self.specs: Tuple[Tuple[str, FieldSpec], ...] = ()
+        self.fields: Tuple[Tuple[str, Callable[[], Any]], ...] = ()
+        # The fields by key, for lazy objects
+        self.producers: Dict[str, Callable[[], Any]] = {}
+        self.columns: Tuple[Callable[[int], List[Any]], ...] = ()
+        self.required_keys: FrozenSet[str] = frozenset()
+
+    def __call__(self) -> Dict[str, Any]:
+        return {key: produce() for key, produce in self.fields}
+
+    def many(self, n: int) -> List[Dict[str, Any]]:
+        if not self.fields:
+            return [{} for _ in range(n)]
+
+        keys = [key for key, _ in self.fields]
+        columns = [column(n) for column in self.columns]
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+class LazyObject(Mapping[str, Any]):
+    """A generated object whose fields are generated on first access
+
+    Returned by :func:`generate` and :func:`generate_many` with ``lazy=True``.
+    Every field is generated once and then kept, nested TypedDicts are
+    :class:`LazyObject` too. Fields are generated in the context the object
+    was created in, in the order they are accessed, so a lazy object is not
+    equal to the eager object of the same seed.
+
+    Lazy objects are read-only mappings, not dicts. ``dict(obj)`` generates
+    the top level fields, :meth:`to_dict` and
+    :func:`disfake.core.encoding.dumps` generate everything. The :mod:`json`
+    module does not encode mappings, pass it :meth:`to_dict` instead.
+    """
+
+    __slots__ = ("_factory", "_values", "_context")
+
+    def __init__(self, factory: _Factory) -> None:
+        self._factory = factory
+        self._values: Dict[str, Any] = {}
+        self._context = context.current()
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+
+        produce = self._factory.producers[key]
+        if isinstance(produce, _Factory):
+            value: Any = LazyObject(produce)
+            value._context = self._context
+        elif context.current() is self._context:
+            value = produce()
+        else:
+            with context.use(self._context):
+                value = produce()
+        # Another thread may have generated the field first
+        return self._values.setdefault(key, value)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._factory.producers)
+
+    def __len__(self) -> int:
+        return len(self._factory.producers)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._factory.producers
+
+    def __repr__(self) -> str:
+        return f"<LazyObject {self._factory.type_!r} {self._values!r}>"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Generate every field, returning the object as plain dicts"""
+        return {
+            key: value.to_dict() if isinstance(value, LazyObject) else value
+            for key, value in self.items()
+        }
+
+
+factories: Dict[Any, _Factory] = {}
+# Factories which are still being compiled, only visible while holding _lock
+_pending: Dict[Any, _Factory] = {}
+
+_snapshot: Optional[Dict[str, Any]] = None
+
+_IMMUTABLE = frozenset((str, int, float, bool, type(None)))
+
+
+def _get_snapshot() -> Dict[str, Any]:
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = schema.load()
+    return _snapshot
+
+
+def _schema_key(type_: Any) -> str:
+    if isinstance(type_, type):
+        return f"{type_.__module__}.{type_.__qualname__}"
+    # Parametrized generics, e.g. ReadyEvent
+    return repr(type_)
+
+
+def _get_factory(type_: Any) -> _Factory:
+    """Get the factory for a type, or for a schema key if ``type_`` is a string"""
+    factory = factories.get(type_)
+    if stats.enabled:
+        stats.record_cache("factories", factory is not None)
+    if factory is not None:
+        return factory
+
+    with _lock:
+        factory = factories.get(type_) or _pending.get(type_)
+        if factory is not None:
+            return factory
+
+        if not isinstance(type_, str):
+            key = _schema_key(type_)
+            if stats.enabled:
+                stats.record_cache("schema", key in _get_snapshot())
+            if key in _get_snapshot():
+                factory = factories[type_] = _get_factory(key)
+                return factory
+
+        # The factory is registered before compiling so that self-referencing
+        # TypedDicts resolve to it instead of recursing forever
+        factory = _pending[type_] = _Factory(type_)
+        try:
+            _compile(factory)
+        finally:
+            del _pending[type_]
+        factories[type_] = factory
+    return factory
+
+
+def _describe(type_: Any) -> Tuple[List[Tuple[str, FieldSpec]], FrozenSet[str]]:
+    """Introspect a TypedDict into its field specs and required keys"""
+    typehints = _get_type_hints(type_)
+
+    specs: List[Tuple[str, FieldSpec]] = []
+    for key, value in typehints.items():
+        spec = _describe_field(value)
+        if spec is not None:
+            specs.append((key, spec))
+
+    required_keys = frozenset(
+        key
+        for key, value in typehints.items()
+        if typing_extensions.get_origin(value) is not NotRequired
+    )
+    return specs, required_keys
+
+
+def _compile(factory: _Factory) -> None:
+    if isinstance(factory.type_, str):
+        try:
+            entry = _get_snapshot()[factory.type_]
+        except KeyError:
+            raise RuntimeError(
+                f"{factory.type_} is referenced but missing from the schema snapshot"
+            ) from None
+        specs = [(key, (kind, payload)) for key, kind, payload in entry["fields"]]
+        required_keys = frozenset(entry["required"])
+    else:
+        specs, required_keys = _describe(factory.type_)
+
+    factory.specs = tuple(specs)
+    factory.fields = tuple((key, _build_field(key, spec)) for key, spec in specs)
+    factory.producers = dict(factory.fields)
+    factory.columns = tuple(
+        _build_column(spec, produce)
+        for (_, spec), (_, produce) in zip(specs, factory.fields)
+    )
+    factory.required_keys = required_keys
+    _check_obj(required_keys, {key for key, _ in specs})
 
-    return []
 
+def _describe_field(value: Any) -> Optional[FieldSpec]:
+    """Describe how a single field is generated
 
-def _generate_field(key: str, value: Any) -> Any:
+    Returns ``None`` if the field should be left out of the generated object.
+    """
     origin = typing_extensions.get_origin(value)
     args = typing_extensions.get_args(value)
 
     if origin is None:
         # Generics don't have an origin, this includes TypedDict and "primitives"
         if typing_extensions.is_typeddict(value):
-            return generate(value)
-        return _generate_primitive(value)
+            return ("typeddict", value)
+        return ("primitive", value)
 
     elif origin is Literal:
-        # Pick a random arg of the Literal
-        return random.choice(args)
+        return ("literal", args)
 
     elif origin is Union:
-        return None
+        return ("none", None)
 
     elif not_required(value):
-        return MISSING
+        return None
 
     elif issubclass(origin, Sequence):
         # If the origin is a Sequence, generate a list
         # This is type agnostic, which is technically wrong because it causes all
         # Sequences to be treated as Lists
-        return _generate_list(key, args[0])
+        return ("list", args[0])
 
     elif origin is dict:
         # A type hint for a dict is pretty useless because no information about it can be inferred
         # We return an empty dict and hope for the best
-        return {}
+        return ("dict", None)
 
-    return MISSING
+    return None
+
+
+def _build_field(key: str, spec: FieldSpec) -> Callable[[], Any]:
+    """Compile a field spec into a zero-argument callable producing its value"""
+    kind, payload = spec
+
+    if kind == "typeddict":
+        return _get_factory(payload)
+    elif kind == "primitive":
+        if isinstance(payload, str):
+            payload = schema.PRIMITIVES[payload]
+        return functools.partial(_generate_primitive, payload)
+    elif kind == "literal":
+        # Pick a random arg of the Literal
+        return functools.partial(_generate_choice, tuple(payload))
+    elif kind == "none":
+        return _generate_none
+    elif kind == "list":
+        return functools.partial(_generate_list, key, payload)
+    elif kind == "dict":
+        return dict
+
+    raise ValueError(f"Unknown field kind {kind!r}")
+
+
+def _build_column(
+    spec: FieldSpec, produce: Callable[[], Any]
+) -> Callable[[int], List[Any]]:
+    """Compile a field spec into a callable producing the field for ``n`` objects"""
+    kind, payload = spec
+
+    if kind == "typeddict":
+        return cast(_Factory, produce).many
+    elif kind == "literal":
+        # All random picks of the field are drawn at once
+        return functools.partial(_generate_choices, tuple(payload))
+    elif kind == "none" or (
+        kind == "primitive" and (payload in _IMMUTABLE or payload in schema.PRIMITIVES)
+    ):
+        # Immutable values can safely be shared between objects
+        return lambda n: [produce()] * n
+    return lambda n: [produce() for _ in range(n)]
 
 
 def generate_union(type_: Any) -> Any:
@@ -158,58 +482,126 @@ def generate_union(type_: Any) -> Any:
         return [generate(arg) for arg in typing.get_args(type_)]
 
 
-def generate(type_: Type[TD]) -> TD:
+@overload
+def generate_many(type_: Type[TD], n: int, *, lazy: Literal[False] = False) -> List[TD]:
+    ...
+
+
+@overload
+def generate_many(type_: Type[TD], n: int, *, lazy: Literal[True]) -> List[LazyObject]:
+    ...
+
+
+@overload
+def generate_many(
+    type_: Type[TD], n: int, *, lazy: bool
+) -> Union[List[TD], List[LazyObject]]:
+    ...
+
+
+def generate_many(
+    type_: Type[TD], n: int, *, lazy: bool = False
+) -> Union[List[TD], List[LazyObject]]:
+    """Generate ``n`` random objects of the given typed dict
+
+    This is faster than calling :func:`generate` ``n`` times, as every field is
+    generated for all objects at once.
+
+    Parameters
+    ----------
+    type_ : Type[TD]
+        The type of the objects to generate
+    n : int
+        The amount of objects to generate
+    lazy : bool
+        Whether to return read-only :class:`LazyObject` which generate their
+        fields on first access
+
+    Returns
+    -------
+    Union[List[TD], List[LazyObject]]
+        The generated objects
+    """
+
+    if not stats.enabled:
+        if lazy:
+            factory = _get_factory(type_)
+            return [LazyObject(factory) for _ in range(n)]
+        return cast(List[TD], _get_factory(type_).many(n))
+
+    start = time.perf_counter()
+    factory = _get_factory(type_)
+    generated = [LazyObject(factory) for _ in range(n)] if lazy else factory.many(n)
+    stats.record_generation(_schema_key(type_), n, time.perf_counter() - start)
+    return cast(Union[List[TD], List[LazyObject]], generated)
+
+
+@overload
+def generate(type_: Type[TD], *, lazy: Literal[False] = False) -> TD:
+    ...
+
+
+@overload
+def generate(type_: Type[TD], *, lazy: Literal[True]) -> LazyObject:
+    ...
+
+
+@overload
+def generate(type_: Type[TD], *, lazy: bool) -> Union[TD, LazyObject]:
+    ...
+
+
+def generate(type_: Type[TD], *, lazy: bool = False) -> Union[TD, LazyObject]:
     """Generate a random object of the given typed dict
 
+    The type is only introspected the first time it is seen, after which a
+    cached factory is used.
+
     Parameters
     ----------
     type_ : Type[TD]
         The type of the object to generate
-    constraints : Optional[Constraints]
-        What constraints to apply to the generated object
+    lazy : bool
+        Whether to return a read-only :class:`LazyObject` which generates its
+        fields on first access, for large objects of which only a few fields
+        are read
 
     Returns
     -------
-    TD
+    Union[TD, LazyObject]
         The generated object
     """
 
-    typehints = _get_type_hints(type_)
-
-    data = {}
-    for key, value in typehints.items():
-        val = _generate_field(key, value)
-        if val is not MISSING:
-            data[key] = val
+    if not stats.enabled:
+        if lazy:
+            return LazyObject(_get_factory(type_))
+        return cast(TD, _get_factory(type_)())
 
-    _check_obj(typehints, data)
+    start = time.perf_counter()
+    factory = _get_factory(type_)
+    generated = LazyObject(factory) if lazy else factory()
+    stats.record_generation(_schema_key(type_), 1, time.perf_counter() - start)
+    return cast(Union[TD, LazyObject], generated)
 
-    return cast(TD, data)
 
-
-def _check_obj(typehints: Dict[str, Any], data: Dict[str, Any]) -> None:
+def _check_obj(required_keys: AbstractSet[str], keys: AbstractSet[str]) -> None:
     """Check that all required fields are present
 
     Parameters
     ----------
-    typehints : dict
-        The type hints for the class
-    data : dict
-        The generated data
+    required_keys : set
+        The keys required by the class
+    keys : set
+        The keys that will be generated
 
     Raises
     ------
     RuntimeError
         If a required field is missing
     """
-    required_keys = {
-        key
-        for key, value in typehints.items()
-        if typing.get_origin(value) is not NotRequired
-    }
-    if not required_keys.issubset(data.keys()):
+    if not required_keys <= keys:
         raise RuntimeError(
             (
-                f"Missing required keys: {required_keys - data.keys()}. This is a bug, please report it."
+                f"Missing required keys: {required_keys - keys}. This is a bug, please report it."
             )
         )
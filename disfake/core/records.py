@@ -0,0 +1,209 @@
+"""Compact records of users and members derived from their snowflakes
+
+Generated users and members only depend on their IDs, see :func:`user` and
+:func:`member`. :class:`UserRecords` and :class:`MemberRecords` store just
+those IDs in sorted arrays of unsigned 64 bit integers, 8 bytes per entity,
+and render the ``discord_typings`` objects whenever they are read. Lookups by
+ID are a binary search.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import operator
+from array import array
+from datetime import timedelta, timezone
+from typing import Iterable, Iterator, List, Mapping, Optional, Union, overload
+
+from discord_typings import GuildMemberData, UserData
+
+from disfake.core.cache import MemberSequence
+from disfake.core.snowflake import to_datetime
+
+__all__ = ("user", "member", "UserRecords", "MemberRecords")
+
+
+def user(id: int) -> UserData:
+    """Render the user derived from a snowflake
+
+    The same snowflake always results in the same user.
+    """
+    id_ = str(id)
+    return {
+        "id": id_,
+        "username": f"User {id_}",
+        "discriminator": id_[-4:],
+        "avatar": None,
+    }
+
+
+def member(u: UserData, guild_id: str) -> GuildMemberData:
+    """Render the member of a user in a guild
+
+    Members join a day after their user was created and only have the
+    ``@everyone`` role.
+    """
+    created_at = to_datetime(int(u["id"]), timezone.utc)
+    joined_at = created_at + timedelta(days=1)
+    return {
+        "user": u,
+        "nick": None,
+        "avatar": None,
+        "roles": [guild_id],
+        "joined_at": joined_at.isoformat(),
+        "deaf": False,
+        "mute": False,
+        "pending": False,
+    }
+
+
+def _extend(ids: "array[int]", new: Iterable[int]) -> "array[int]":
+    """Add IDs to a sorted array, returning the array to keep"""
+    added = array("Q", new)
+    if not added:
+        return ids
+    # IDs allocated in order, such as a block of snowflakes, are appended
+    # without merging
+    if isinstance(new, range):
+        ascending = new.step > 0
+    else:
+        ascending = all(map(operator.lt, added, itertools.islice(added, 1, None)))
+    if ascending and (not ids or ids[-1] < added[0]):
+        ids.extend(added)
+        return ids
+    return array("Q", sorted(set(ids).union(added)))
+
+
+def _index(ids: "array[int]", id: int) -> int:
+    """The position of ``id`` in a sorted array, or ``-1``"""
+    index = bisect.bisect_left(ids, id)
+    if index < len(ids) and ids[index] == id:
+        return index
+    return -1
+
+
+def _to_int(id: object) -> int:
+    if isinstance(id, str) and id.isdigit():
+        return int(id)
+    return -1
+
+
+class UserRecords(Mapping[str, UserData]):
+    """Users keyed by their ID, of which only the ID is stored
+
+    Parameters
+    ----------
+    ids : Iterable[int]
+        The IDs of the users
+    """
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: Iterable[int] = ()) -> None:
+        self._ids: "array[int]" = _extend(array("Q"), ids)
+
+    def add(self, id: int) -> None:
+        self.extend((id,))
+
+    def extend(self, ids: Iterable[int]) -> None:
+        self._ids = _extend(self._ids, ids)
+
+    def discard(self, id: int) -> bool:
+        """Remove a user, returning whether it was stored"""
+        index = _index(self._ids, id)
+        if index < 0:
+            return False
+        del self._ids[index]
+        return True
+
+    def clear(self) -> None:
+        self._ids = array("Q")
+
+    def ids(self) -> "array[int]":
+        """The sorted IDs of the users, which must not be modified"""
+        return self._ids
+
+    def __getitem__(self, user_id: str) -> UserData:
+        id_ = _to_int(user_id)
+        if _index(self._ids, id_) < 0:
+            raise KeyError(user_id)
+        return user(id_)
+
+    def __contains__(self, user_id: object) -> bool:
+        return _index(self._ids, _to_int(user_id)) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return map(str, self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class MemberRecords(MemberSequence):
+    """The members of a guild, of which only the user IDs are stored
+
+    Members are ordered by user ID and rendered with :func:`member` on every
+    access. Unlike :class:`~disfake.http.guild.LazyMembers`, members can be
+    added and removed without materializing the guild, see
+    :meth:`MemberCache.add_ids <disfake.core.cache.MemberCache.add_ids>`.
+
+    Parameters
+    ----------
+    guild_id : str
+        The ID of the guild
+    ids : Iterable[int]
+        The IDs of the member users
+    """
+
+    __slots__ = ("guild_id", "_ids")
+
+    def __init__(self, guild_id: str, ids: Iterable[int] = ()) -> None:
+        self.guild_id = guild_id
+        self._ids: "array[int]" = _extend(array("Q"), ids)
+
+    def extend(self, ids: Iterable[int]) -> None:
+        self._ids = _extend(self._ids, ids)
+
+    def discard(self, id: int) -> bool:
+        """Remove a member, returning whether it was stored"""
+        index = _index(self._ids, id)
+        if index < 0:
+            return False
+        del self._ids[index]
+        return True
+
+    def ids(self) -> "array[int]":
+        """The sorted IDs of the member users, which must not be modified"""
+        return self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @overload
+    def __getitem__(self, index: int) -> GuildMemberData:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[GuildMemberData]:
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[GuildMemberData, List[GuildMemberData]]:
+        if isinstance(index, slice):
+            return [member(user(id_), self.guild_id) for id_ in self._ids[index]]
+        return member(user(self._ids[index]), self.guild_id)
+
+    def __iter__(self) -> Iterator[GuildMemberData]:
+        for id_ in self._ids:
+            yield member(user(id_), self.guild_id)
+
+    def find(self, user_id: str) -> Optional[GuildMemberData]:
+        id_ = _to_int(user_id)
+        if _index(self._ids, id_) < 0:
+            return None
+        return member(user(id_), self.guild_id)
+
+    def user_ids(self) -> Iterator[str]:
+        return map(str, self._ids)
@@ -0,0 +1,181 @@
+"""Precomputed schema snapshots of the TypedDicts disfake generates
+
+Resolving the ``discord_typings`` annotations is the most expensive part of
+the first :func:`~disfake.core.generator.generate` call in a process. This
+module stores the result of that introspection in a compact JSON file, which
+the generator loads instead. Types missing from the snapshot are still
+introspected at runtime.
+
+Regenerate the bundled snapshot after upgrading ``discord_typings`` with::
+
+    python -m disfake.core.schema
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+__all__ = ("SCHEMA_PATH", "PRIMITIVES", "roots", "build", "dump", "load")
+
+SCHEMA_VERSION = 1
+SCHEMA_PATH = Path(__file__).with_name("schema.json")
+
+PRIMITIVES: Dict[str, type] = {
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "NoneType": type(None),
+}
+
+
+def _discord_typings_version() -> Optional[str]:
+    # discord_typings.__version__ is not kept up to date with releases
+    from importlib import metadata
+
+    try:
+        return metadata.version("discord-typings")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def roots() -> List[Any]:
+    """The TypedDicts used by :mod:`disfake.http` and :mod:`disfake.gateway`"""
+    from discord_typings import (
+        GuildData,
+        GuildMembersChunkEvent,
+        HeartbeatACKEvent,
+        HeartbeatCommand,
+        HelloEvent,
+        InvalidSessionEvent,
+        ReadyEvent,
+        ReconnectEvent,
+        ResumedEvent,
+        RoleData,
+        TypingStartEvent,
+        UserData,
+    )
+
+    return [
+        GuildData,
+        RoleData,
+        UserData,
+        HelloEvent,
+        HeartbeatCommand,
+        HeartbeatACKEvent,
+        ReadyEvent,
+        InvalidSessionEvent,
+        ReconnectEvent,
+        ResumedEvent,
+        GuildMembersChunkEvent,
+        TypingStartEvent,
+    ]
+
+
+def _encode_payload(kind: str, payload: Any) -> Any:
+    from disfake.core import generator
+
+    if kind == "typeddict":
+        return generator._schema_key(payload)  # pyright: ignore[reportPrivateUsage]
+    elif kind == "primitive":
+        name = getattr(payload, "__name__", None)
+        if name not in PRIMITIVES or PRIMITIVES[name] is not payload:
+            raise TypeError(f"{payload!r} can not be stored in a schema snapshot")
+        return name
+    elif kind == "literal":
+        return list(payload)
+    # The element type of lists is not used while generating
+    return None
+
+
+def build(types: Optional[Iterable[Any]] = None) -> Dict[str, Any]:
+    """Introspect the given types and everything nested in them
+
+    Parameters
+    ----------
+    types : Optional[Iterable[Any]]
+        The TypedDicts to include. Defaults to :func:`roots`.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The schema snapshot, ready to be written by :func:`dump`
+    """
+    from disfake.core import generator
+
+    queue = list(roots() if types is None else types)
+    entries: Dict[str, Any] = {}
+
+    while queue:
+        type_ = queue.pop()
+        key = generator._schema_key(type_)  # pyright: ignore[reportPrivateUsage]
+        if key in entries:
+            continue
+
+        (
+            specs,
+            required_keys,
+        ) = generator._describe(  # pyright: ignore[reportPrivateUsage]
+            type_
+        )
+        fields: List[Any] = []
+        for name, (kind, payload) in specs:
+            if kind == "typeddict":
+                queue.append(payload)
+            fields.append([name, kind, _encode_payload(kind, payload)])
+
+        entries[key] = {"fields": fields, "required": sorted(required_keys)}
+
+    return {
+        "version": SCHEMA_VERSION,
+        "discord_typings": _discord_typings_version(),
+        "types": dict(sorted(entries.items())),
+    }
+
+
+def dump(snapshot: Dict[str, Any], path: Union[str, Path] = SCHEMA_PATH) -> None:
+    """Write a snapshot created by :func:`build` to disk"""
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(snapshot, file, separators=(",", ":"))
+        file.write("\n")
+
+
+def load(path: Union[str, Path] = SCHEMA_PATH) -> Dict[str, Any]:
+    """Load the types of a schema snapshot
+
+    An empty mapping is returned if the snapshot does not exist or was built
+    for a different version of ``discord_typings``, in which case everything
+    is introspected at runtime.
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            snapshot = json.load(file)
+    except FileNotFoundError:
+        return {}
+
+    if (
+        snapshot.get("version") != SCHEMA_VERSION
+        or snapshot.get("discord_typings") != _discord_typings_version()
+    ):
+        return {}
+    return snapshot["types"]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m disfake.core.schema",
+        description="Write a schema snapshot of the TypedDicts disfake generates",
+    )
+    parser.add_argument("-o", "--output", type=Path, default=SCHEMA_PATH)
+    args = parser.parse_args(argv)
+
+    snapshot = build()
+    dump(snapshot, args.output)
+    print(f"Wrote {len(snapshot['types'])} types to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,149 @@
 import hashlib
+import itertools
 import random
-from datetime import datetime
-from typing import List, Optional, TypeVar, Union
+import threading
+import time
+from array import array
+from datetime import datetime, tzinfo
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from disfake.core import stats
 
 T = TypeVar("T")
 
 
+# Ref: https://discord.dev/reference#snowflakes
+DISCORD_EPOCH = 1420070400000
+
+TIMESTAMP_SHIFT = 22
+WORKER_SHIFT = 17
+PROCESS_SHIFT = 12
+
+WORKER_MAX = 0x1F
+PROCESS_MAX = 0x1F
+INCREMENT_MAX = 0xFFF
+
+
+class SnowflakeHistory:
+    """Compact record of issued snowflakes
+
+    Snowflakes are stored as unsigned 64 bit integers. With a ``limit`` only
+    the most recent ``limit`` snowflakes are kept in a ring buffer.
+    """
+
+    __slots__ = ("limit", "_data", "_start")
+
+    def __init__(self, limit: Optional[int] = None) -> None:
+        if limit is not None and limit <= 0:
+            raise ValueError("limit must be positive")
+
+        self.limit = limit
+        self._data = array("Q")
+        self._start = 0
+
+    def append(self, snowflake: int) -> None:
+        if self.limit is None or len(self._data) < self.limit:
+            self._data.append(snowflake)
+        else:
+            self._data[self._start] = snowflake
+            self._start = (self._start + 1) % self.limit
+
+    def extend(self, snowflakes: Iterable[int]) -> None:
+        if self.limit is None:
+            self._data.extend(snowflakes)
+            return
+        for snowflake in snowflakes:
+            self.append(snowflake)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self._data[self._start :]
+        yield from self._data[: self._start]
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += len(self._data)
+        if not 0 <= index < len(self._data):
+            raise IndexError("history index out of range")
+        return self._data[(self._start + index) % len(self._data)]
+
+
 class Snowflake:
-    def __init__(self, worker: Union[int, str], process: Union[int, str]) -> None:
+    def __init__(
+        self,
+        worker: Union[int, str],
+        process: Union[int, str],
+        *,
+        history: bool = False,
+        history_limit: Optional[int] = None,
+        now: Optional[float] = None,
+        seed: Optional[Union[int, str]] = None,
+    ) -> None:
 
-        # Result cache
-        self.snowflakes: List[int] = []
+        # Issued snowflakes, only kept if asked for
+        self.snowflakes: Optional[SnowflakeHistory] = (
+            SnowflakeHistory(history_limit) if history else None
+        )
 
-        self.worker: str = str(worker).zfill(5)
-        self.process: str = str(process).zfill(5)
-        self._now: Optional[float] = None
+        self.worker: int = int(worker)
+        self.process: int = int(process)
+        if not 0 <= self.worker <= WORKER_MAX:
+            raise ValueError(f"worker must be between 0 and {WORKER_MAX}")
+        if not 0 <= self.process <= PROCESS_MAX:
+            raise ValueError(f"process must be between 0 and {PROCESS_MAX}")
+
+        self._base = self.worker << WORKER_SHIFT | self.process << PROCESS_SHIFT
+        # The millisecond currently being issued from and its next increment
+        self._timestamp = 0
+        self._increment = 0
+        self._lock = threading.Lock()
+        # A fixed clock, as a unix timestamp in seconds
+        self._now: Optional[float] = now
+        self._random = random.Random(seed)
+        # Increments reserved for snowflakes laid out in the past, see
+        # reserve_increments
+        self._reserved = 0
+
+    def getstate(self) -> Dict[str, Any]:
+        """Get the allocator state, to be restored with :meth:`setstate`
+
+        The issued snowflakes are not part of the state.
+        """
+        with self._lock:
+            return {
+                "worker": self.worker,
+                "process": self.process,
+                "timestamp": self._timestamp,
+                "increment": self._increment,
+                "now": self._now,
+                "random": self._random.getstate(),
+                "reserved": self._reserved,
+            }
+
+    def setstate(self, state: Dict[str, Any]) -> None:
+        """Continue issuing snowflakes from a state returned by :meth:`getstate`"""
+        with self._lock:
+            self.worker = state["worker"]
+            self.process = state["process"]
+            self._base = self.worker << WORKER_SHIFT | self.process << PROCESS_SHIFT
+            self._timestamp = state["timestamp"]
+            self._increment = state["increment"]
+            self._now = state["now"]
+            self._random.setstate(state["random"])
+            self._reserved = state.get("reserved", 0)
 
     def hash(self, value: int, /) -> str:
         """Generate a discord cdn like hash from an integer
@@ -31,25 +160,122 @@ class Snowflake:
         """
         return hashlib.sha1(str(value).encode("utf-8")).hexdigest()
 
+    def time(self) -> float:
+        """The current unix time of the generator, its fixed clock if it has one"""
+        return self._now if self._now is not None else time.time()
+
+    def _allocate(self, n: int) -> Tuple[int, int]:
+        """Reserve ``n`` increments, returning the first timestamp and increment
+
+        Like Discord, once the increment of a millisecond is exhausted the
+        following millisecond is used, even if the clock has not reached it yet.
+        """
+        timestamp = int(self.time() * 1000) - DISCORD_EPOCH
+        if stats.enabled:
+            stats.record_count("snowflakes", n)
+
+        with self._lock:
+            if timestamp > self._timestamp:
+                self._timestamp = timestamp
+                self._increment = 0
+
+            timestamp, increment = self._timestamp, self._increment
+            carry, self._increment = divmod(increment + n, INCREMENT_MAX + 1)
+            self._timestamp += carry
+        return timestamp, increment
+
+    def reserve_increments(self, n: int) -> int:
+        """Reserve ``n`` increments of every millisecond, returning the first
+
+        Snowflakes which are laid out over past milliseconds instead of being
+        issued, such as the messages of a
+        :class:`~disfake.http.message.MessageHistory`, use increments nobody
+        else reserved, so they never collide. Increments are reserved from the
+        highest down, as issued snowflakes start at increment 0.
+
+        Raises
+        ------
+        ValueError
+            Fewer than ``n`` increments are left
+        """
+        if n < 1:
+            raise ValueError("n must be positive")
+        with self._lock:
+            if self._reserved + n > INCREMENT_MAX + 1:
+                raise ValueError(
+                    "not enough increments left, use another worker or process"
+                )
+            self._reserved += n
+            return INCREMENT_MAX + 1 - self._reserved
+
     def snowflake(self, offset: int = 0) -> int:
         """Generate a snowflake from the current time
 
+        Parameters
+        ----------
+        offset : int
+            Seconds to add to the timestamp of the snowflake
+
         Returns
         -------
         int
             The snowflake generated
         """
-        now = (self._now or datetime.now().timestamp()) + (offset)
-
-        # Cursed black magic
-        # Ref: https://discord.dev/reference#snowflakes
-        timestamp = bin((int(now * 1000) - 1420070400000) << 22)[2:40].zfill(42)
-        increment = bin(len(self.snowflakes))[2:].rjust(12, "0")
+        timestamp, increment = self._allocate(1)
+        timestamp += int(offset * 1000)
 
-        snowflake = int(timestamp + self.worker + self.process + increment, 2)
-        self.snowflakes.append(snowflake)
+        snowflake = timestamp << TIMESTAMP_SHIFT | self._base | increment
+        if self.snowflakes is not None:
+            self.snowflakes.append(snowflake)
         return snowflake
 
+    def block(self, n: int, offset: int = 0) -> Sequence[int]:
+        """Generate ``n`` consecutive snowflakes in one call
+
+        The snowflakes share the current timestamp and increment by one. If the
+        12 bit increment would overflow, the remaining snowflakes continue in
+        the following milliseconds.
+
+        Parameters
+        ----------
+        n : int
+            The amount of snowflakes to generate
+        offset : int
+            Seconds to add to the timestamp of the snowflakes
+
+        Returns
+        -------
+        Sequence[int]
+            The snowflakes generated, as a ``range`` if they fit in a single
+            millisecond
+
+        Raises
+        ------
+        ValueError
+            ``n`` is negative
+        """
+        if n < 0:
+            raise ValueError("n must not be negative")
+        timestamp, increment = self._allocate(n)
+        timestamp += int(offset * 1000)
+
+        ranges: List[range] = []
+        while n > 0:
+            start = timestamp << TIMESTAMP_SHIFT | self._base | increment
+            count = min(n, INCREMENT_MAX + 1 - increment)
+            ranges.append(range(start, start + count))
+            n -= count
+            timestamp += 1
+            increment = 0
+
+        if len(ranges) == 1:
+            snowflakes: Sequence[int] = ranges[0]
+        else:
+            snowflakes = array("Q", itertools.chain.from_iterable(ranges))
+        if self.snowflakes is not None:
+            self.snowflakes.extend(snowflakes)
+        return snowflakes
+
     def bool(self) -> bool:
         """Generate a random boolean
 
@@ -58,24 +284,81 @@ class Snowflake:
         bool
             The boolean generated
         """
-        return random.choice([True, False])
+        return self._random.choice([True, False])
 
 
-def to_datetime(snowflake: int) -> datetime:
+def to_datetime(snowflake: int, tz: Optional[tzinfo] = None) -> datetime:
     """Convert a snowflake to a datetime object
 
     Parameters
     ----------
     snowflake : int
         The snowflake to convert
+    tz : Optional[tzinfo]
+        The timezone of the datetime, by default a naive local datetime is
+        returned
 
     Returns
     -------
     datetime
         The datetime object
     """
-    timestamp = snowflake / 4194304 + 1420070400000
-    return datetime.fromtimestamp(timestamp / 1000.0)
+    timestamp = (snowflake >> TIMESTAMP_SHIFT) + DISCORD_EPOCH
+    return datetime.fromtimestamp(timestamp / 1000.0, tz)
+
+
+def from_timestamp(
+    timestamp: float, worker: int = 0, process: int = 0, increment: int = 0
+) -> int:
+    """Build the snowflake of a unix timestamp
+
+    Parameters
+    ----------
+    timestamp : float
+        The unix timestamp in seconds, truncated to milliseconds
+    worker, process, increment : int
+        The other fields of the snowflake
+
+    Returns
+    -------
+    int
+        The snowflake
+    """
+    milliseconds = int(timestamp * 1000) - DISCORD_EPOCH
+    if milliseconds < 0:
+        raise ValueError("timestamp is before the Discord epoch")
+    return (
+        milliseconds << TIMESTAMP_SHIFT
+        | worker << WORKER_SHIFT
+        | process << PROCESS_SHIFT
+        | increment
+    )
+
+
+def to_datetimes(snowflakes: Iterable[int]) -> List[datetime]:
+    """Convert many snowflakes to datetime objects
+
+    Parameters
+    ----------
+    snowflakes : Iterable[int]
+        The snowflakes to convert
+
+    Returns
+    -------
+    List[datetime]
+        The datetime objects, in the same order
+    """
+    fromtimestamp = datetime.fromtimestamp
+    return [
+        fromtimestamp(((snowflake >> TIMESTAMP_SHIFT) + DISCORD_EPOCH) / 1000.0)
+        for snowflake in snowflakes
+    ]
 
 
-__all__ = ("Snowflake",)
+__all__ = (
+    "Snowflake",
+    "SnowflakeHistory",
+    "to_datetime",
+    "to_datetimes",
+    "from_timestamp",
+)
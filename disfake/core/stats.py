@@ -0,0 +1,208 @@
+"""Opt-in instrumentation of the generation hot paths
+
+Nothing is recorded until :func:`enable` is called, while disabled every
+instrumented call only checks :data:`enabled`. :func:`stats` returns a
+snapshot of everything recorded since the last :func:`reset`, and hooks added
+with :func:`add_hook` receive every measurement as it is recorded, for example
+to forward it to a profiler.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Generator, List, Optional
+
+__all__ = (
+    "enable",
+    "disable",
+    "collecting",
+    "reset",
+    "stats",
+    "add_hook",
+    "remove_hook",
+    "Stats",
+    "GenerationStats",
+    "CacheStats",
+)
+
+enabled = False
+"""Whether measurements are recorded, see :func:`enable`"""
+
+# Called with (event, name, value), see add_hook
+Hook = Callable[[str, str, float], None]
+
+_lock = threading.Lock()
+# name -> [count, seconds]
+_generation: Dict[str, List[float]] = {}
+# name -> [hits, misses]
+_caches: Dict[str, List[int]] = {}
+_counters: Dict[str, int] = {}
+_hooks: List[Hook] = []
+
+
+@dataclass(frozen=True)
+class GenerationStats:
+    """The objects generated of a single type"""
+
+    count: int
+    seconds: float
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """The accesses of an internal cache"""
+
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass(frozen=True)
+class Stats:
+    """A snapshot of the recorded measurements
+
+    ``generation`` is keyed by the schema key of the generated type, such as
+    ``discord_typings.resources.user.UserData``. Objects generated as part of
+    another object are not counted separately.
+
+    ``caches`` holds the type hint, ``TYPE_CHECKING`` import, factory and
+    schema snapshot caches of :mod:`disfake.core.generator`. ``counters``
+    holds the allocated snowflakes and the cache inserts.
+
+    The sizes of the user and member caches are those of the current
+    :class:`~disfake.core.context.GenerationContext`, their memory is only
+    estimated if asked for.
+    """
+
+    generation: Dict[str, GenerationStats]
+    caches: Dict[str, CacheStats]
+    counters: Dict[str, int]
+    users: int
+    guilds: int
+    users_bytes: Optional[int] = None
+    members_bytes: Optional[int] = None
+
+
+def enable() -> None:
+    """Start recording measurements"""
+    global enabled
+    enabled = True
+
+
+def disable() -> None:
+    """Stop recording measurements, the recorded ones are kept"""
+    global enabled
+    enabled = False
+
+
+@contextlib.contextmanager
+def collecting() -> Generator[None, None, None]:
+    """Record measurements while the block runs"""
+    previous = enabled
+    enable()
+    try:
+        yield
+    finally:
+        if not previous:
+            disable()
+
+
+def reset() -> None:
+    """Forget all recorded measurements"""
+    with _lock:
+        _generation.clear()
+        _caches.clear()
+        _counters.clear()
+
+
+def add_hook(hook: Hook) -> None:
+    """Call ``hook`` with every measurement while recording
+
+    The hook is called with an event, a name and a value:
+
+    - ``("generate", type name, seconds)`` for every generated object, or
+      batch of objects
+    - ``("cache_hit", cache name, 1)`` and ``("cache_miss", cache name, 1)``
+    - ``("count", counter name, amount)``
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    _hooks.remove(hook)
+
+
+def record_generation(name: str, count: int, seconds: float) -> None:
+    with _lock:
+        entry = _generation.get(name)
+        if entry is None:
+            _generation[name] = [count, seconds]
+        else:
+            entry[0] += count
+            entry[1] += seconds
+    for hook in _hooks:
+        hook("generate", name, seconds)
+
+
+def record_cache(name: str, hit: bool) -> None:
+    with _lock:
+        entry = _caches.get(name)
+        if entry is None:
+            entry = _caches[name] = [0, 0]
+        entry[0 if hit else 1] += 1
+    for hook in _hooks:
+        hook("cache_hit" if hit else "cache_miss", name, 1)
+
+
+def record_count(name: str, amount: int = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+    for hook in _hooks:
+        hook("count", name, amount)
+
+
+def stats(memory: bool = False) -> Stats:
+    """Get a snapshot of the recorded measurements
+
+    Parameters
+    ----------
+    memory : bool
+        Whether to estimate the memory used by the user and member caches,
+        which walks every cached object. Users of a snapshot which were not
+        read yet are not counted, records count 8 bytes per ID.
+
+    Returns
+    -------
+    Stats
+        The snapshot
+    """
+    from disfake.core import context
+
+    ctx = context.current()
+    users_bytes = members_bytes = None
+    if memory:
+        users_bytes = ctx.users.sizeof()
+        members_bytes = ctx.members.sizeof()
+
+    with _lock:
+        return Stats(
+            {
+                name: GenerationStats(int(count), seconds)
+                for name, (count, seconds) in _generation.items()
+            },
+            {
+                name: CacheStats(hits, misses)
+                for name, (hits, misses) in _caches.items()
+            },
+            dict(_counters),
+            len(ctx.users),
+            len(ctx.members),
+            users_bytes,
+            members_bytes,
+        )
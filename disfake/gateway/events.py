@@ -1,4 +1,8 @@
+from typing import Iterator, Optional, Sequence
+
 from discord_typings import (
+    GuildMemberData,
+    GuildMembersChunkEvent,
     HeartbeatACKEvent,
     HeartbeatCommand,
     HelloEvent,
@@ -6,9 +10,11 @@ from discord_typings import (
     ReadyEvent,
     ReconnectEvent,
     ResumedEvent,
+    TypingStartEvent,
     UserData,
 )
 
+from ..core import context
 from ..core.generator import generate
 
 __all__ = (
@@ -19,6 +25,8 @@ __all__ = (
     "invalid_session",
     "reconnect",
     "resumed",
+    "typing_start",
+    "guild_members_chunks",
 )
 
 
@@ -53,3 +61,72 @@ def reconnect() -> ReconnectEvent:
 
 def resumed() -> ResumedEvent:
     return generate(ResumedEvent)
+
+
+def typing_start(
+    guild_id: str, member: GuildMemberData, channel_id: Optional[str] = None
+) -> TypingStartEvent:
+    """Create a ``TYPING_START`` event of a guild member
+
+    The channel defaults to ``guild_id``, like the default channel of the
+    guild. Channels are generated by :mod:`disfake.http.channel`.
+    """
+    user = member.get("user")
+    assert user is not None, "Typing members need a user"
+
+    event = generate(TypingStartEvent)
+    event["d"]["channel_id"] = channel_id or guild_id
+    event["d"]["guild_id"] = guild_id
+    event["d"]["user_id"] = user["id"]
+    event["d"]["timestamp"] = int(context.current().snowflake.time())
+    event["d"]["member"] = member
+    return event
+
+
+def guild_members_chunks(
+    guild_id: str,
+    members: Sequence[GuildMemberData],
+    chunk_size: int = 1000,
+    *,
+    start: int = 0,
+    nonce: Optional[str] = None,
+) -> Iterator[GuildMembersChunkEvent]:
+    """Split members into ``GUILD_MEMBERS_CHUNK`` events
+
+    Chunks are sliced from ``members`` one at a time as the iterator is
+    consumed. Like Discord, a single empty chunk is sent if there are no
+    members.
+
+    Parameters
+    ----------
+    guild_id : str
+        The ID of the guild the members belong to
+    members : Sequence[GuildMemberData]
+        The members to send, usually taken from :attr:`disfake.core.cache.members`
+    chunk_size : int
+        The maximum amount of members per chunk
+    start : int
+        The index of the first member to send
+    nonce : Optional[str]
+        The nonce of the request the chunks answer
+
+    Yields
+    ------
+    GuildMembersChunkEvent
+        The chunk events
+    """
+    total = max(len(members) - start, 0)
+    chunk_count = max(-(-total // chunk_size), 1)
+
+    for chunk_index in range(chunk_count):
+        offset = start + chunk_index * chunk_size
+        chunk = members[offset : offset + chunk_size]
+
+        event = generate(GuildMembersChunkEvent)
+        event["d"]["guild_id"] = guild_id
+        event["d"]["members"] = chunk if isinstance(chunk, list) else list(chunk)
+        event["d"]["chunk_index"] = chunk_index
+        event["d"]["chunk_count"] = chunk_count
+        if nonce is not None:
+            event["d"]["nonce"] = nonce
+        yield event
@@ -1,10 +1,25 @@
-from typing import List, TypedDict
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypedDict,
+    cast,
+)
 
 from discord_typings import (
     ChannelCreateData,
     GuildCreateData,
     GuildData,
     GuildMemberData,
+    GuildMembersChunkEvent,
     GuildScheduledEventData,
     StageInstanceData,
     ThreadChannelData,
@@ -12,7 +27,8 @@ from discord_typings import (
     VoiceStateData,
 )
 
-from ..core import cache
+from ..core import context
+from . import events
 
 
 class UniqueCreateData(TypedDict):
@@ -29,26 +45,129 @@ class UniqueCreateData(TypedDict):
     guild_scheduled_events: List[GuildScheduledEventData]
 
 
+# Shared by every view, the lists are only created by GuildCreateView.to_dict
+_EMPTY: Tuple[()] = ()
+_MISSING = object()
+_LIST_FIELDS = (
+    "voice_states",
+    "members",
+    "channels",
+    "threads",
+    "presences",
+    "stage_instances",
+    "guild_scheduled_events",
+)
+
+
+class GuildCreateView(MutableMapping[str, Any]):
+    """A ``GUILD_CREATE`` payload sharing its guild and cached members
+
+    Keys missing from the view are read from the guild, the guild itself is
+    never copied or changed. Assigning or deleting keys only changes the view,
+    so views of one guild can be handed out to many sessions. Nested objects,
+    such as the roles, are shared with the guild and must be replaced instead
+    of mutated, or the view converted with :meth:`to_dict` first.
+    """
+
+    __slots__ = ("guild", "_guild", "_fields", "_deleted")
+
+    def __init__(
+        self,
+        guild: GuildData,
+        members: Sequence[GuildMemberData],
+        *,
+        large: bool,
+        member_count: int,
+    ) -> None:
+        self.guild = guild
+        self._guild = cast(Mapping[str, Any], guild)
+        self._fields: Dict[str, Any] = {
+            "joined_at": "2021-01-01T00:00:00.000000+00:00",
+            "large": large,
+            "unavailable": False,
+            "member_count": member_count,
+            "voice_states": _EMPTY,
+            "members": members,
+            "channels": _EMPTY,
+            "threads": _EMPTY,
+            "presences": _EMPTY,
+            "stage_instances": _EMPTY,
+            "guild_scheduled_events": _EMPTY,
+        }
+        self._deleted: Set[str] = set()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._fields:
+            return self._fields[key]
+        if key in self._deleted:
+            raise KeyError(key)
+        return self._guild[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._fields[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        found = self._fields.pop(key, _MISSING) is not _MISSING
+        if key in self._guild and key not in self._deleted:
+            self._deleted.add(key)
+            found = True
+        if not found:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._fields
+        for key in self._guild:
+            if key not in self._fields and key not in self._deleted:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> GuildCreateData:
+        """Copy the view into a new payload
+
+        The top level lists are copied, lazy member sequences are materialized.
+        The objects in those lists are still shared.
+        """
+        data: Dict[str, Any] = dict(self)
+        for key, value in data.items():
+            if key in _LIST_FIELDS or isinstance(value, list):
+                data[key] = list(cast(Iterable[Any], value))
+        return data  # type: ignore
+
+
 def promote_guild(guild: GuildData, include_members: bool = False) -> GuildCreateData:
-    data: GuildCreateData = guild.copy()  # type: ignore
+    return guild_create_view(guild, include_members).to_dict()
 
-    members: List[GuildMemberData] = []
+
+def guild_create_view(
+    guild: GuildData, include_members: bool = False
+) -> GuildCreateView:
+    members: Sequence[GuildMemberData] = _EMPTY
     if include_members:
-        members = cache.members.get(guild["id"]) or []
-
-    unique: UniqueCreateData = {
-        "joined_at": "2021-01-01T00:00:00.000000+00:00",
-        "large": False,
-        "unavailable": False,
-        "member_count": len(members),
-        "voice_states": [],
-        "members": members,
-        "channels": [],
-        "threads": [],
-        "presences": [],
-        "stage_instances": [],
-        "guild_scheduled_events": [],
-    }
-
-    data.update(unique)  # type: ignore
-    return data
+        members = context.current().members.get(guild["id"]) or _EMPTY
+
+    return GuildCreateView(guild, members, large=False, member_count=len(members))
+
+
+def promote_large_guild(
+    guild: GuildData,
+    large_threshold: int = 250,
+    chunk_size: int = 1000,
+    nonce: Optional[str] = None,
+) -> Tuple[GuildCreateData, Iterator[GuildMembersChunkEvent]]:
+    members: Sequence[GuildMemberData] = (
+        context.current().members.get(guild["id"]) or []
+    )
+
+    data = GuildCreateView(
+        guild,
+        members[:large_threshold],
+        large=len(members) > large_threshold,
+        member_count=len(members),
+    ).to_dict()
+    chunks = events.guild_members_chunks(
+        guild["id"], members, chunk_size, start=large_threshold, nonce=nonce
+    )
+    return data, chunks
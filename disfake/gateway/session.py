@@ -0,0 +1,296 @@
+"""An in-process stand-in for a gateway websocket connection
+
+:class:`GatewaySession` behaves like the client side of a websocket: the bot
+sends commands with :meth:`~GatewaySession.send` and receives events with
+:meth:`~GatewaySession.recv`. The session sends ``HELLO`` right away, and
+``READY`` followed by a ``GUILD_CREATE`` for every guild once it is identified.
+Dispatch events are then sent at a target rate, paced by the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from discord_typings import GuildData, UserData
+
+from ..core import context
+from ..core.context import GenerationContext
+from ..core.encoding import EncodedEvent, PayloadCache, dumps
+from ..http.user import generate as generate_user
+from . import events
+
+__all__ = ("GatewaySession", "GatewayClosed", "dispatch_mix")
+
+# Consumers of an unpaced session still give other tasks a chance to run
+_YIELD_EVERY = 256
+
+
+class GatewayClosed(Exception):
+    """The session was closed, like a websocket close frame
+
+    Attributes
+    ----------
+    code : int
+        The close code, such as ``4001`` for an unknown opcode
+    """
+
+    def __init__(self, code: int, reason: str = "") -> None:
+        super().__init__(f"gateway closed with code {code}: {reason}")
+        self.code = code
+        self.reason = reason
+
+
+def dispatch_mix(
+    factories: Mapping[str, Callable[[], Mapping[str, Any]]],
+    weights: Optional[Sequence[float]] = None,
+    *,
+    rng: Optional[random.Random] = None,
+) -> Iterator[Mapping[str, Any]]:
+    """Endlessly pick dispatch events from weighted factories
+
+    Parameters
+    ----------
+    factories : Mapping[str, Callable[[], Mapping[str, Any]]]
+        Functions creating a dispatch event, keyed by a name for the weights
+    weights : Optional[Sequence[float]]
+        The relative weight of every factory, all factories are equally likely
+        by default
+    rng : Optional[random.Random]
+        The random generator to pick with, defaults to the one of the current
+        :class:`~disfake.core.context.GenerationContext`
+
+    Yields
+    ------
+    Mapping[str, Any]
+        The created events
+    """
+    rng = rng or context.current().random
+    makers = list(factories.values())
+    while True:
+        # The factories are picked in batches
+        for make in rng.choices(makers, weights, k=1024):
+            yield make()
+
+
+class GatewaySession:
+    """A simulated gateway connection
+
+    Parameters
+    ----------
+    user : Optional[UserData]
+        The user of the ``READY`` event, a new user by default
+    guilds : Sequence[GuildData]
+        The guilds to send ``GUILD_CREATE`` events for
+    dispatch : Optional[Iterable[Mapping[str, Any]]]
+        The dispatch events sent after the guilds, such as
+        :func:`dispatch_mix`. Their ``s`` field is replaced. Dispatch events
+        with a ``close`` method, such as an
+        :class:`~disfake.gateway.storms.EventStorm`, are closed with the
+        session.
+    rate : Optional[float]
+        The maximum amount of dispatch events per second, unlimited by default
+    heartbeat_interval : int
+        The interval of the ``HELLO`` event in milliseconds
+    include_members : bool
+        Whether the ``GUILD_CREATE`` events include the cached members
+    ctx : Optional[GenerationContext]
+        The context to generate with, by default the current context
+    payloads : Optional[PayloadCache]
+        Where the ``READY`` and ``GUILD_CREATE`` events are cached, share one
+        between sessions to encode those events once. A session closes the
+        payload cache it creates when it is closed.
+    """
+
+    def __init__(
+        self,
+        user: Optional[UserData] = None,
+        guilds: Sequence[GuildData] = (),
+        *,
+        dispatch: Optional[Iterable[Mapping[str, Any]]] = None,
+        rate: Optional[float] = None,
+        heartbeat_interval: int = 41250,
+        include_members: bool = False,
+        ctx: Optional[GenerationContext] = None,
+        payloads: Optional[PayloadCache] = None,
+    ) -> None:
+        self.context = ctx or context.current()
+        # Payload caches created by the session are closed with it
+        self._owns_payloads = payloads is None
+        self.payloads = payloads or PayloadCache(self.context)
+        with context.use(self.context):
+            self.user = user or generate_user()
+            hello = events.hello()
+        hello["d"]["heartbeat_interval"] = heartbeat_interval
+
+        self.guilds = guilds
+        self.include_members = include_members
+        self.rate = rate
+        # The sequence number of the last dispatch event sent
+        self.sequence = 0
+        self.identified = False
+
+        self._dispatch = None if dispatch is None else iter(dispatch)
+        # Closed with the session, such as an EventStorm
+        self._dispatch_source = dispatch
+        self._sent = 0
+        self._started = 0.0
+        self._queue: Deque[Union[bytes, EncodedEvent]] = deque([dumps(hello)])
+        # Created on first use, to belong to the running event loop
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closed: Optional[Tuple[int, str]] = None
+
+    async def send(self, message: Union[str, bytes, Mapping[str, Any]]) -> None:
+        """Send a gateway command to the session
+
+        ``HEARTBEAT`` is answered with ``HEARTBEAT_ACK``, ``IDENTIFY`` starts
+        the ``READY`` and ``GUILD_CREATE`` events and ``RESUME`` is answered
+        with ``RESUMED``. Other opcodes close the session with code ``4001``.
+        """
+        self._check_closed()
+        payload = message if isinstance(message, Mapping) else json.loads(message)
+
+        op = payload.get("op")
+        if op == 1:
+            self._queue.append(dumps(events.heartbeat_ack()))
+        elif op == 2:
+            if self.identified:
+                self._close(4005, "Already authenticated")
+            else:
+                self._identify()
+        elif op == 6:
+            # Resumed sessions continue with the dispatch events
+            with context.use(self.context):
+                self._queue.append(EncodedEvent(events.resumed()))
+            if not self.identified:
+                self.identified = True
+                self._started = asyncio.get_running_loop().time()
+        else:
+            self._close(4001, "Unknown opcode")
+        self._wake()
+
+    def _identify(self) -> None:
+        self.identified = True
+        self._queue.append(self.payloads.ready(self.user))
+        for guild in self.guilds:
+            self._queue.append(self.payloads.guild_create(guild, self.include_members))
+        self._started = asyncio.get_running_loop().time()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _check_closed(self) -> None:
+        if self._closed is not None:
+            raise GatewayClosed(*self._closed)
+
+    def _close(self, code: int, reason: str) -> None:
+        self._closed = (code, reason)
+        if self._owns_payloads:
+            self._owns_payloads = False
+            self.payloads.close()
+        close = getattr(self._dispatch_source, "close", None)
+        if close is not None:
+            close()
+        self._dispatch_source = None
+        self._wake()
+
+    async def close(self, code: int = 1000) -> None:
+        """Close the session, pending and future :meth:`recv` calls raise
+        :class:`GatewayClosed`"""
+        if self._closed is None:
+            self._close(code, "")
+
+    def _pop(self) -> bytes:
+        item = self._queue.popleft()
+        if isinstance(item, EncodedEvent):
+            self.sequence += 1
+            return item.encode(self.sequence)
+        return item
+
+    def _next_dispatch(self) -> Optional[bytes]:
+        assert self._dispatch is not None
+        event = next(self._dispatch, None)
+        if event is None:
+            self._dispatch = None
+            return None
+
+        self._sent += 1
+        self.sequence += 1
+        # Dispatch events are only sent once, they are encoded directly
+        return b'{"op":0,"t":"%s","d":%s,"s":%d}' % (
+            str(event["t"]).encode(),
+            dumps(event["d"]),
+            self.sequence,
+        )
+
+    async def recv_bytes(self) -> bytes:
+        """Like :meth:`recv`, without decoding the event"""
+        while True:
+            self._check_closed()
+            if self._queue:
+                return self._pop()
+
+            timeout: Optional[float] = None
+            if self.identified and self._dispatch is not None:
+                if self.rate is None:
+                    if self._sent % _YIELD_EVERY == _YIELD_EVERY - 1:
+                        await asyncio.sleep(0)
+                    timeout = 0.0
+                else:
+                    # Events are sent as soon as they are due, without a sleep
+                    # per event
+                    due = self._started + self._sent / self.rate
+                    timeout = due - asyncio.get_running_loop().time()
+
+                if timeout <= 0:
+                    message = self._next_dispatch()
+                    if message is not None:
+                        return message
+                    continue
+
+            if self._wakeup is None:
+                self._wakeup = asyncio.Event()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def recv(self) -> str:
+        """Wait for the next event
+
+        Returns
+        -------
+        str
+            The JSON encoded event
+
+        Raises
+        ------
+        GatewayClosed
+            The session was closed
+        """
+        return (await self.recv_bytes()).decode("utf-8")
+
+    def __aiter__(self) -> GatewaySession:
+        return self
+
+    async def __anext__(self) -> str:
+        try:
+            return await self.recv()
+        except GatewayClosed:
+            raise StopAsyncIteration from None
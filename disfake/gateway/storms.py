@@ -0,0 +1,344 @@
+"""High-rate dispatch events of cached guild members
+
+:class:`EventStorm` creates ``PRESENCE_UPDATE``, ``TYPING_START`` and
+``MESSAGE_CREATE`` events in batches. The random picks of a batch, the event
+types, guilds, members and statuses, are drawn at once with
+:meth:`random.Random.choices`, and events are built as plain dicts instead of
+going through :func:`~disfake.core.generator.generate`. An event storm is an
+endless iterator, to be passed as the ``dispatch`` of a
+:class:`~disfake.gateway.session.GatewaySession`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import gc
+import itertools
+from datetime import timezone
+from types import TracebackType
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+from discord_typings import GuildMemberData, UserData
+
+from ..core import context, records
+from ..core.context import GenerationContext
+from ..core.snowflake import TIMESTAMP_SHIFT, to_datetime
+from ..http.guild import LazyMembers
+
+__all__ = ("EventStorm", "EVENT_TYPES")
+
+EVENT_TYPES = ("PRESENCE_UPDATE", "TYPING_START", "MESSAGE_CREATE")
+
+_STATUSES = ("online", "idle", "dnd", "offline")
+_STATUS_WEIGHTS = (6, 2, 1, 1)
+
+_Event = Dict[str, Any]
+_Actor = Tuple[UserData, GuildMemberData, Dict[str, Any]]
+# The guilds with members and their cumulative member counts
+_Guilds = Tuple[List[Tuple[str, Sequence[Union[int, str]]]], List[int]]
+
+# The most members kept by an event storm at once
+_MAX_ACTORS = 1 << 15
+
+
+@contextlib.contextmanager
+def _paused_gc() -> Generator[None, None, None]:
+    """Pause the cyclic garbage collector
+
+    Events hold no reference cycles, but the many dicts of a batch trigger
+    collections which walk every tracked object, most of them in the caches.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class EventStorm:
+    """Endless dispatch events of the members of cached guilds
+
+    Guilds are picked in proportion to their member count, members uniformly.
+    The members are read from the member cache of ``ctx`` and the user IDs of
+    every guild are kept until its members change. Events of the same member
+    share its user and member dicts, which must not be modified.
+
+    A storm watches the caches until it is closed, with :meth:`close` or by
+    using it as a context manager.
+
+    Parameters
+    ----------
+    guild_ids : Sequence[str]
+        The guilds whose members cause the events, guilds without cached
+        members are skipped
+    weights : Optional[Mapping[str, float]]
+        The relative weight of every event type in :data:`EVENT_TYPES`,
+        missing types are not created. All types are equally likely by default.
+    channels : Optional[Mapping[str, Sequence[str]]]
+        The channel IDs of every guild to type and send messages in. Guilds
+        without channels use their own ID, like their default channel.
+    batch_size : int
+        The amount of events created at once while iterating
+    ctx : Optional[GenerationContext]
+        The context of the caches, snowflakes and random generator, by default
+        the current context
+    """
+
+    def __init__(
+        self,
+        guild_ids: Sequence[str],
+        *,
+        weights: Optional[Mapping[str, float]] = None,
+        channels: Optional[Mapping[str, Sequence[str]]] = None,
+        batch_size: int = 4096,
+        ctx: Optional[GenerationContext] = None,
+    ) -> None:
+        weights = weights or dict.fromkeys(EVENT_TYPES, 1.0)
+        unknown = set(weights) - set(EVENT_TYPES)
+        if unknown:
+            raise ValueError(f"unknown event types: {', '.join(sorted(unknown))}")
+
+        self.context = ctx or context.current()
+        self.guild_ids = guild_ids
+        self.channels = channels or {}
+        self.batch_size = batch_size
+        self._types = list(weights)
+        self._type_weights = list(weights.values())
+        self._makers = {
+            "PRESENCE_UPDATE": self.presence_updates,
+            "TYPING_START": self.typing_starts,
+            "MESSAGE_CREATE": self.message_creates,
+        }
+        # Guild ID -> user IDs of its members, as stored by records and lazy
+        # members
+        self._user_ids: Dict[str, Sequence[Union[int, str]]] = {}
+        self._guilds: Optional[_Guilds] = None
+        # Guilds stored as records, whose picked members are rendered directly
+        self._compact: Set[str] = set()
+        # Recently picked members, see _actor
+        self._actors: Dict[Tuple[str, str], _Actor] = {}
+        self._closed = False
+        self.context.users.subscribe(self._users_changed)
+        self.context.members.subscribe(self._members_changed)
+
+    def close(self) -> None:
+        """Stop watching the caches, called by the session the storm is the
+        ``dispatch`` of once it is closed"""
+        if not self._closed:
+            self._closed = True
+            self.context.users.unsubscribe(self._users_changed)
+            self.context.members.unsubscribe(self._members_changed)
+
+    def __enter__(self) -> EventStorm:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def _users_changed(self, id: Optional[str]) -> None:
+        self._actors.clear()
+
+    def _members_changed(self, id: Optional[str]) -> None:
+        self._actors.clear()
+        if id is None:
+            self._user_ids.clear()
+            self._compact.clear()
+            self._guilds = None
+        elif id in self._user_ids:
+            del self._user_ids[id]
+            self._compact.discard(id)
+            self._guilds = None
+
+    def _members_of(self, guild_id: str) -> Sequence[Union[int, str]]:
+        user_ids = self._user_ids.get(guild_id)
+        if user_ids is None:
+            members = self.context.members.get(guild_id)
+            if isinstance(members, records.MemberRecords):
+                # Members are picked from the IDs of the records, which change
+                # in place or are replaced only with a notification
+                user_ids = members.ids()
+                self._compact.add(guild_id)
+            elif isinstance(members, LazyMembers):
+                user_ids = members.ids
+            else:
+                user_ids = [] if members is None else list(members.user_ids())
+            self._user_ids[guild_id] = user_ids
+        return user_ids
+
+    def _pick(self, n: int) -> List[Tuple[str, str]]:
+        """Draw ``n`` guild members as ``(guild ID, user ID)``"""
+        if self._guilds is None:
+            populated = [
+                (id, self._members_of(id))
+                for id in self.guild_ids
+                if self._members_of(id)
+            ]
+            cum_sizes = list(itertools.accumulate(len(ids) for _, ids in populated))
+            self._guilds = populated, cum_sizes
+        guilds, cum_sizes = self._guilds
+        if not guilds:
+            raise ValueError("none of the guilds has cached members")
+
+        rng = self.context.random
+        random = rng.random
+        return [
+            (guild_id, str(user_ids[int(random() * len(user_ids))]))
+            for guild_id, user_ids in rng.choices(guilds, cum_weights=cum_sizes, k=n)
+        ]
+
+    def _actor(self, key: Tuple[str, str]) -> _Actor:
+        """Get the user, member and member without user of a guild member
+
+        Members are kept until the caches change, as rendering the members of
+        records costs more than building an event.
+        """
+        actor = self._actors.get(key)
+        if actor is not None:
+            return actor
+
+        guild_id, user_id = key
+        member = None
+        if guild_id not in self._compact:
+            member = self.context.members.member(guild_id, user_id)
+        if member is None:
+            # Members of records were picked from the records, which did not
+            # change since
+            member = records.member(records.user(int(user_id)), guild_id)
+        partial: Dict[str, Any] = dict(member)
+        user = partial.pop("user", None) or self._user(user_id)
+
+        if len(self._actors) >= _MAX_ACTORS:
+            self._actors.clear()
+        actor = self._actors[key] = (user, member, partial)
+        return actor
+
+    def _user(self, user_id: str) -> UserData:
+        return self.context.users.get(user_id) or records.user(int(user_id))
+
+    def _channel(self, guild_id: str) -> str:
+        channels = self.channels.get(guild_id)
+        if not channels:
+            return guild_id
+        return channels[int(self.context.random.random() * len(channels))]
+
+    @_paused_gc()
+    def presence_updates(self, n: int) -> List[_Event]:
+        """Create ``n`` ``PRESENCE_UPDATE`` events"""
+        statuses = self.context.random.choices(_STATUSES, _STATUS_WEIGHTS, k=n)
+        actor = self._actor
+        return [
+            {
+                "op": 0,
+                "t": "PRESENCE_UPDATE",
+                "s": 0,
+                "d": {
+                    "user": actor(key)[0],
+                    "guild_id": key[0],
+                    "status": status,
+                    "activities": [],
+                    "client_status": {"desktop": status},
+                },
+            }
+            for key, status in zip(self._pick(n), statuses)
+        ]
+
+    @_paused_gc()
+    def typing_starts(self, n: int) -> List[_Event]:
+        """Create ``n`` ``TYPING_START`` events"""
+        timestamp = int(self.context.snowflake.time())
+        actor = self._actor
+        channel = self._channel
+        return [
+            {
+                "op": 0,
+                "t": "TYPING_START",
+                "s": 0,
+                "d": {
+                    "channel_id": channel(key[0]),
+                    "guild_id": key[0],
+                    "user_id": key[1],
+                    "timestamp": timestamp,
+                    "member": actor(key)[1],
+                },
+            }
+            for key in self._pick(n)
+        ]
+
+    @_paused_gc()
+    def message_creates(self, n: int) -> List[_Event]:
+        """Create ``n`` ``MESSAGE_CREATE`` events with consecutive snowflakes"""
+        ids = self.context.snowflake.block(n)
+        # Consecutive snowflakes mostly share their millisecond
+        timestamps: Dict[int, str] = {}
+        actor = self._actor
+        channel = self._channel
+        events: List[_Event] = []
+        for id, key in zip(ids, self._pick(n)):
+            millisecond = id >> TIMESTAMP_SHIFT
+            timestamp = timestamps.get(millisecond)
+            if timestamp is None:
+                timestamp = timestamps[millisecond] = to_datetime(
+                    id, timezone.utc
+                ).isoformat()
+
+            author, _, member = actor(key)
+            events.append(
+                {
+                    "op": 0,
+                    "t": "MESSAGE_CREATE",
+                    "s": 0,
+                    "d": {
+                        "id": str(id),
+                        "channel_id": channel(key[0]),
+                        "guild_id": key[0],
+                        "author": author,
+                        "member": member,
+                        "content": f"Message {id}",
+                        "timestamp": timestamp,
+                        "edited_timestamp": None,
+                        "tts": False,
+                        "mention_everyone": False,
+                        "mentions": [],
+                        "mention_roles": [],
+                        "attachments": [],
+                        "embeds": [],
+                        "pinned": False,
+                        "type": 0,
+                    },
+                }
+            )
+        return events
+
+    @_paused_gc()
+    def batch(self, n: Optional[int] = None) -> List[_Event]:
+        """Create ``n`` events of randomly picked types, ``batch_size`` by default"""
+        n = self.batch_size if n is None else n
+        kinds = self.context.random.choices(self._types, self._type_weights, k=n)
+        created = {
+            kind: iter(self._makers[kind](kinds.count(kind))) for kind in self._types
+        }
+        return [next(created[kind]) for kind in kinds]
+
+    def __iter__(self) -> Iterator[_Event]:
+        while True:
+            yield from self.batch()
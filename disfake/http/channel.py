@@ -0,0 +1,61 @@
+from typing import Any, Optional
+
+from discord_typings import TextChannelData
+
+from ..core import context
+from ..core.snowflake import Snowflake
+
+
+def generate(
+    snowflake: Optional[Snowflake] = None,
+    guild_id: Optional[str] = None,
+    **kwargs: Any,
+) -> TextChannelData:
+    """Generate a fake text channel
+
+    Parameters
+    ----------
+    snowflake
+        The snowflake generator to use, defaults to the one of the current
+        :class:`~disfake.core.context.GenerationContext`
+    guild_id
+        The guild of the channel, if any
+    kwargs
+        Additional values to be added to the generated channel
+
+    Returns
+    -------
+    TextChannelData
+        The generated channel
+    """
+    channel = from_id((snowflake or context.current().snowflake).snowflake(), guild_id)
+    channel.update(kwargs)  # type: ignore
+    return channel
+
+
+def from_id(id: int, guild_id: Optional[str] = None) -> TextChannelData:
+    """Build the fake text channel belonging to a snowflake
+
+    The same snowflake always results in the same channel.
+
+    Returns
+    -------
+    TextChannelData
+        The channel
+    """
+    id_ = str(id)
+    channel: TextChannelData = {
+        "id": id_,
+        "type": 0,
+        "position": 0,
+        "permission_overwrites": [],
+        "name": f"channel-{id_}",
+        "topic": None,
+        "nsfw": False,
+        "last_message_id": None,
+        "rate_limit_per_user": 0,
+        "parent_id": None,
+    }
+    if guild_id is not None:
+        channel["guild_id"] = guild_id
+    return channel
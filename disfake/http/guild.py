@@ -1,29 +1,80 @@
 from __future__ import annotations
 
-from datetime import timedelta
-from typing import Any
+import bisect
+from array import array
+from typing import Any, Iterator, Optional, Sequence, Union, overload
 
-from discord_typings import GuildData, GuildMemberData, RoleData, UserData
+from discord_typings import GuildData, GuildMemberData, RoleData
 
-from disfake.core import cache
+from disfake.core import cache, context, records
+from disfake.core.context import GenerationContext
 from disfake.core.generator import generate as _generate
-from disfake.core.snowflake import Snowflake, to_datetime
+from disfake.core.snowflake import Snowflake
 from disfake.http import user
 
 
-def _promote_to_member(u: UserData, guild_id: str) -> GuildMemberData:
-    created_at = to_datetime(int(u["id"]))
-    joined_at = created_at + timedelta(days=1)
-    return {
-        "user": u,
-        "nick": None,
-        "avatar": None,
-        "roles": [guild_id],
-        "joined_at": joined_at.isoformat(),
-        "deaf": False,
-        "mute": False,
-        "pending": False,
-    }
+class LazyMembers(cache.MemberSequence):
+    """The members of a guild, built on access
+
+    Only the sorted user ids are stored, every member is derived from its id
+    with :func:`~disfake.http.user.from_id` each time it is accessed. Lookups
+    by user id are a binary search. Slicing
+    returns another :class:`LazyMembers`. See
+    :class:`~disfake.core.records.MemberRecords` for members which can also be
+    added without materializing the guild.
+    """
+
+    __slots__ = ("guild_id", "ids")
+
+    def __init__(self, guild_id: str, ids: Sequence[int]) -> None:
+        self.guild_id = guild_id
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @overload
+    def __getitem__(self, index: int) -> GuildMemberData:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> LazyMembers:
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[GuildMemberData, LazyMembers]:
+        if isinstance(index, slice):
+            return LazyMembers(self.guild_id, self.ids[index])
+        return records.member(user.from_id(self.ids[index]), self.guild_id)
+
+    def __iter__(self) -> Iterator[GuildMemberData]:
+        for id_ in self.ids:
+            yield records.member(user.from_id(id_), self.guild_id)
+
+    def find(self, user_id: str) -> Optional[GuildMemberData]:
+        id_ = int(user_id)
+        index = bisect.bisect_left(self.ids, id_)
+        if index == len(self.ids) or self.ids[index] != id_:
+            return None
+        return records.member(user.from_id(id_), self.guild_id)
+
+    def user_ids(self) -> Iterator[str]:
+        return map(str, self.ids)
+
+    def discard(self, id: int) -> bool:
+        """Remove a member, returning whether it was stored
+
+        The ids are copied to an array on the first removal, as ranges and
+        the ids of snapshots can not be modified.
+        """
+        index = bisect.bisect_left(self.ids, id)
+        if index == len(self.ids) or self.ids[index] != id:
+            return False
+        if not isinstance(self.ids, array):
+            self.ids = array("Q", self.ids)
+        del self.ids[index]
+        return True
 
 
 def _fill(
@@ -33,25 +84,61 @@ def _fill(
     role_count: int,
     *,
     snowflake: Snowflake,
+    ctx: GenerationContext,
+    lazy_members: bool,
+    compact_members: bool,
+    member_ids: Optional[Sequence[int]],
 ) -> None:
     guild["id"] = str(snowflake.snowflake())
     guild["name"] = f"Guild {guild['id']}"
 
     _fill_roles(guild, role_count, snowflake=snowflake)
-    _fill_members(guild, member_count, snowflake=snowflake)
-    _fill_emojis(guild, emoji_count, snowflake=snowflake)
-
-
-def _fill_members(guild: GuildData, member_count: int, *, snowflake: Snowflake) -> None:
-    owner = user.generate(snowflake)
-    cache.users.add(owner)
-    guild["owner_id"] = owner["id"]
-
-    cache.members.add(guild["id"], _promote_to_member(owner, guild["id"]))
-    for _ in range(member_count):
-        member = user.generate(snowflake)
-        cache.users.add(member)
-        cache.members.add(guild["id"], _promote_to_member(member, guild["id"]))
+    _fill_members(
+        guild,
+        member_count,
+        snowflake=snowflake,
+        ctx=ctx,
+        lazy=lazy_members,
+        compact=compact_members,
+        member_ids=member_ids,
+    )
+    _fill_emojis(guild, emoji_count, snowflake=snowflake, ctx=ctx)
+
+
+def _fill_members(
+    guild: GuildData,
+    member_count: int,
+    *,
+    snowflake: Snowflake,
+    ctx: GenerationContext,
+    lazy: bool,
+    compact: bool,
+    member_ids: Optional[Sequence[int]],
+) -> None:
+    # The owner is the first member, followed by member_count other members
+    ids = snowflake.block(member_count + 1) if member_ids is None else member_ids
+    guild["owner_id"] = str(ids[0])
+    if compact:
+        if member_ids is None:
+            ctx.users.add_ids(ids)
+        ctx.members.add_ids(guild["id"], ids)
+        return
+
+    if lazy:
+        if member_ids is None:
+            ctx.users.add_ids(ids)
+        # Blocks of snowflakes are sorted already
+        sorted_ids = ids if member_ids is None else sorted(ids)
+        ctx.members.set(guild["id"], LazyMembers(guild["id"], sorted_ids))
+        return
+
+    for id_ in ids:
+        # Existing users are shared with their other guilds
+        member = None if member_ids is None else ctx.users.get(str(id_))
+        if member is None:
+            member = user.from_id(id_)
+            ctx.users.add(member)
+        ctx.members.add(guild["id"], records.member(member, guild["id"]))
 
 
 def _fill_roles(guild: GuildData, role_count: int, *, snowflake: Snowflake) -> None:
@@ -69,10 +156,17 @@ def _fill_roles(guild: GuildData, role_count: int, *, snowflake: Snowflake) -> N
         guild["roles"].append(role)
 
 
-def _fill_emojis(guild: GuildData, emoji_count: int, *, snowflake: Snowflake) -> None:
-    owner = cache.users.get(guild["owner_id"])
+def _fill_emojis(
+    guild: GuildData,
+    emoji_count: int,
+    *,
+    snowflake: Snowflake,
+    ctx: GenerationContext,
+) -> None:
+    owner = ctx.users.get(guild["owner_id"])
     assert owner is not None, "Guild owner not found"
 
+    # Every emoji shares the cached owner
     for _ in range(emoji_count):
         id = snowflake.snowflake()
         guild["emojis"].append(
@@ -89,16 +183,39 @@ def _fill_emojis(guild: GuildData, emoji_count: int, *, snowflake: Snowflake) ->
 
 
 def generate(
-    snowflake: Snowflake = cache.snowflake,
+    snowflake: Optional[Snowflake] = None,
     member_count: int = 0,
     emoji_count: int = 0,
     role_count: int = 0,
+    *,
+    lazy_members: bool = False,
+    compact_members: bool = False,
+    member_ids: Optional[Sequence[int]] = None,
     **kwargs: Any,
 ) -> GuildData:
     """Generate a fake guild
 
+    Members are added to the caches of the current context. Members and
+    emojis embed the cached user objects instead of copies, they are shared
+    and must not be mutated.
+
     Parameters
     ----------
+    snowflake
+        The snowflake generator to use, defaults to the one of the current
+        :class:`~disfake.core.context.GenerationContext`
+    lazy_members
+        Store the members as :class:`LazyMembers` in the member cache instead
+        of building them up front. Their users are added to the user cache as
+        :class:`~disfake.core.records.UserRecords`.
+    compact_members
+        Store the members as :class:`~disfake.core.records.MemberRecords` and
+        their users as :class:`~disfake.core.records.UserRecords`, which only
+        hold their IDs. Takes precedence over ``lazy_members``.
+    member_ids
+        The IDs of cached users to use as members instead of generating
+        ``member_count`` new users, the first one owns the guild. The members
+        embed the cached users.
     kwargs
         Additional values to be added the generated guild
 
@@ -107,7 +224,18 @@ def generate(
     GuildData
         The generated guild
     """
+    ctx = context.current()
     guild = _generate(GuildData)
-    _fill(guild, member_count, emoji_count, role_count, snowflake=snowflake)
+    _fill(
+        guild,
+        member_count,
+        emoji_count,
+        role_count,
+        snowflake=snowflake or ctx.snowflake,
+        ctx=ctx,
+        lazy_members=lazy_members,
+        compact_members=compact_members,
+        member_ids=member_ids,
+    )
     guild.update(kwargs)  # type: ignore
     return guild
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import bisect
+from array import array
+from datetime import timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Union, overload
+
+from discord_typings import ChannelMessageData, UserData
+
+from ..core import context, records
+from ..core.context import GenerationContext
+from ..core.snowflake import TIMESTAMP_SHIFT, from_timestamp, to_datetime
+
+# The default span of a history, in seconds
+HISTORY_SPAN = 365 * 24 * 60 * 60
+
+
+def from_id(id: int, channel_id: str, author: UserData) -> ChannelMessageData:
+    """Build the fake message belonging to a snowflake
+
+    The same snowflake, channel and author always result in the same message.
+
+    Returns
+    -------
+    ChannelMessageData
+        The message
+    """
+    id_ = str(id)
+    return {
+        "id": id_,
+        "channel_id": channel_id,
+        "author": author,
+        "content": f"Message {id_}",
+        "timestamp": to_datetime(id, timezone.utc).isoformat(),
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+
+class _HistoryIds(Sequence[int]):
+    """The sorted IDs of a history, computed for the virtual messages"""
+
+    __slots__ = ("_first", "_span", "_count", "_tail")
+
+    def __init__(self, first: int, span: int, count: int, tail: array[int]) -> None:
+        self._first = first
+        self._span = span
+        self._count = count
+        self._tail = tail
+
+    def __len__(self) -> int:
+        return self._count + len(self._tail)
+
+    @overload
+    def __getitem__(self, index: int) -> int:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[int]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[int, List[int]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if 0 <= index < self._count:
+            # Every virtual message has its own millisecond, as the span has at
+            # least one millisecond per message
+            offset = index * self._span // self._count
+            return self._first + (offset << TIMESTAMP_SHIFT)
+        return self._tail[index - self._count]
+
+
+class MessageHistory:
+    """The messages of a channel, ordered by their snowflakes
+
+    The history starts with ``count`` virtual messages, spread evenly between
+    ``start`` and ``end``. Histories with more messages than milliseconds in
+    that span start earlier, at one message per millisecond until ``end``.
+    The virtual messages of every history share an increment reserved with
+    :meth:`~disfake.core.snowflake.Snowflake.reserve_increments`, so
+    histories never share IDs.
+    Virtual messages are not stored, their IDs are
+    computed from their position and the messages are built with
+    :func:`from_id` when they are read. Every message is written by one of
+    ``authors``. Messages added later are stored.
+
+    Queries are a binary search over the IDs, followed by building at most
+    ``limit`` messages.
+
+    Parameters
+    ----------
+    channel_id : str
+        The ID of the channel
+    authors : Sequence[int]
+        The IDs of the users writing the virtual messages, users which are
+        not cached are built with :func:`~disfake.core.records.user`
+    count : int
+        The amount of virtual messages
+    start, end : Optional[float]
+        The unix timestamps of the virtual messages, by default the year
+        before the clock of the snowflake generator of ``ctx``
+    ctx : Optional[GenerationContext]
+        The context of the users and snowflakes, by default the current context
+    """
+
+    def __init__(
+        self,
+        channel_id: str,
+        authors: Sequence[int] = (),
+        count: int = 0,
+        *,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        ctx: Optional[GenerationContext] = None,
+    ) -> None:
+        if count and not authors:
+            raise ValueError("virtual messages need authors")
+        self.channel_id = channel_id
+        self.authors = authors
+        self.context = ctx or context.current()
+
+        snowflake = self.context.snowflake
+        end = snowflake.time() if end is None else end
+        start = end - HISTORY_SPAN if start is None else start
+        # Virtual messages end before the millisecond of end, so appended
+        # messages are newer. Dense histories start earlier instead.
+        span = max(int((end - start) * 1000), count)
+        last = from_timestamp(end, snowflake.worker, snowflake.process)
+        if last >> TIMESTAMP_SHIFT < span:
+            raise ValueError("the history starts before the Discord epoch")
+        first = last - (span << TIMESTAMP_SHIFT)
+        if count:
+            # The virtual messages of every history use their own increment
+            first |= snowflake.reserve_increments(1)
+
+        self._tail: array[int] = array("Q")
+        self._ids = _HistoryIds(first, span, count, self._tail)
+        # Added and edited messages, by ID
+        self._messages: Dict[int, ChannelMessageData] = {}
+        self._deleted: Set[int] = set()
+
+    @property
+    def ids(self) -> Sequence[int]:
+        """The sorted IDs of the messages, including deleted messages"""
+        return self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._deleted)
+
+    def _position(self, id: int) -> int:
+        index = bisect.bisect_left(self._ids, id)
+        if index < len(self._ids) and self._ids[index] == id:
+            return index
+        return -1
+
+    def __contains__(self, message_id: object) -> bool:
+        if not isinstance(message_id, str) or not message_id.isdigit():
+            return False
+        id = int(message_id)
+        return id not in self._deleted and self._position(id) >= 0
+
+    def _author(self, id: int) -> UserData:
+        # Authors are spread over the messages by a multiplicative hash
+        author_id = self.authors[(id * 0x9E3779B1 >> 16) % len(self.authors)]
+        return self.context.users.get(str(author_id)) or records.user(author_id)
+
+    def _render(self, id: int) -> ChannelMessageData:
+        message = self._messages.get(id)
+        if message is not None:
+            return message
+        return from_id(id, self.channel_id, self._author(id))
+
+    def get(self, message_id: str) -> Optional[ChannelMessageData]:
+        """Get a message, or ``None`` if it is not in the history"""
+        if message_id not in self:
+            return None
+        return self._render(int(message_id))
+
+    def add(self, message: ChannelMessageData) -> None:
+        """Add a message newer than all others, or replace a message
+
+        Raises
+        ------
+        ValueError
+            The message is older than the newest message without being part
+            of the history
+        """
+        id = int(message["id"])
+        if self._position(id) < 0:
+            if self._ids and id < self._ids[-1]:
+                raise ValueError("messages are added in the order of their IDs")
+            self._tail.append(id)
+        self._deleted.discard(id)
+        self._messages[id] = message
+
+    def append(
+        self, author: Optional[UserData] = None, **kwargs: Any
+    ) -> ChannelMessageData:
+        """Send a new message to the channel
+
+        Parameters
+        ----------
+        author : Optional[UserData]
+            The author, by default one of the authors of the history
+        kwargs
+            Additional values to be added to the message
+
+        Returns
+        -------
+        ChannelMessageData
+            The message
+        """
+        if author is None and not self.authors:
+            raise ValueError("the history has no authors to pick from")
+        id = self.context.snowflake.snowflake()
+        message = from_id(id, self.channel_id, author or self._author(id))
+        message.update(kwargs)  # type: ignore
+        self.add(message)
+        return message
+
+    def remove(self, message_id: str) -> Optional[ChannelMessageData]:
+        """Delete a message, returning the deleted message"""
+        message = self.get(message_id)
+        if message is not None:
+            id = int(message_id)
+            self._deleted.add(id)
+            self._messages.pop(id, None)
+        return message
+
+    def _walk(self, index: int, step: int, limit: int) -> Iterator[int]:
+        """Yield up to ``limit`` IDs which are not deleted, from ``index``"""
+        ids = self._ids
+        deleted = self._deleted
+        while limit > 0 and 0 <= index < len(ids):
+            id = ids[index]
+            if id not in deleted:
+                yield id
+                limit -= 1
+            index += step
+
+    def history(
+        self,
+        limit: int = 50,
+        *,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        around: Optional[str] = None,
+    ) -> List[ChannelMessageData]:
+        """Get messages like ``GET /channels/{channel.id}/messages``
+
+        Only one of ``before``, ``after`` and ``around`` may be passed. Without
+        them the newest messages are returned.
+
+        Parameters
+        ----------
+        limit : int
+            The maximum amount of messages
+        before, after : Optional[str]
+            Get the messages before or after this message ID
+        around : Optional[str]
+            Get the messages around this message ID, including that message
+
+        Returns
+        -------
+        List[ChannelMessageData]
+            The messages, newest first
+        """
+        if sum(anchor is not None for anchor in (before, after, around)) > 1:
+            raise ValueError("only one of before, after and around can be passed")
+        if limit < 1:
+            return []
+
+        ids = self._ids
+        if after is not None:
+            start = bisect.bisect_right(ids, int(after))
+            found = list(self._walk(start, 1, limit))
+            found.reverse()
+        elif around is not None:
+            middle = bisect.bisect_left(ids, int(around))
+            newer = list(self._walk(middle, 1, limit - limit // 2))
+            found = list(self._walk(middle - 1, -1, limit - len(newer)))
+            newer.reverse()
+            found[:0] = newer
+        else:
+            end = len(ids) if before is None else bisect.bisect_left(ids, int(before))
+            found = list(self._walk(end - 1, -1, limit))
+        return [self._render(id) for id in found]
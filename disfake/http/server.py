@@ -0,0 +1,442 @@
+"""A local REST API server backed by the caches of a generation context
+
+:class:`RestServer` serves the read-only core routes of the Discord REST API
+over HTTP/1.1 with asyncio streams. Connections are kept alive and pipelined
+requests are answered in order. Responses carry Discord-style rate limit
+headers, and requests over the limit of their bucket get a ``429`` response.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import hashlib
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from types import TracebackType
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+from urllib.parse import parse_qs, urlsplit
+
+from discord_typings import GuildData, TextChannelData, UserData
+
+from ..core import context
+from ..core.context import GenerationContext
+from ..core.encoding import PayloadCache, dumps
+from .message import MessageHistory
+
+__all__ = ("RestServer", "RateLimit")
+
+_Response = Tuple[int, bytes]
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """How many requests a bucket allows per window
+
+    Like Discord, every route with its major parameter (the guild ID) is its
+    own bucket, per ``Authorization`` header.
+    """
+
+    limit: int = 50
+    per: float = 1.0
+
+
+class _Bucket:
+    __slots__ = ("remaining", "reset")
+
+    def __init__(self) -> None:
+        self.remaining = 0
+        self.reset = 0.0
+
+
+_BAD_REQUEST = b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n"
+
+
+def _error(status: int, message: str, code: int = 0) -> _Response:
+    return status, dumps({"message": message, "code": code})
+
+
+def _not_found(message: str, code: int) -> _Response:
+    return _error(404, f"Unknown {message}", code)
+
+
+class RestServer:
+    """Serve users, guilds, members, roles, emojis and messages over HTTP
+
+    Users and members are read from the caches of ``ctx``, guilds and channels
+    have to be added with :meth:`add_guild` and :meth:`add_channel`. The served
+    routes are, with or without an ``/api/v{version}`` prefix:
+
+    - ``GET /users/@me`` and ``GET /users/{user.id}``
+    - ``GET /guilds/{guild.id}``
+    - ``GET /guilds/{guild.id}/members`` with ``limit`` and ``after``
+    - ``GET /guilds/{guild.id}/members/{user.id}``
+    - ``GET /guilds/{guild.id}/roles``
+    - ``GET /guilds/{guild.id}/emojis`` and
+      ``GET /guilds/{guild.id}/emojis/{emoji.id}``
+    - ``GET /channels/{channel.id}``
+    - ``GET /channels/{channel.id}/messages`` with ``limit`` and one of
+      ``before``, ``after`` and ``around``
+    - ``GET /channels/{channel.id}/messages/{message.id}``
+
+    Parameters
+    ----------
+    guilds : Sequence[GuildData]
+        The guilds to serve
+    user : Optional[UserData]
+        The user returned for ``/users/@me``
+    rate_limit : Optional[RateLimit]
+        The limit of every bucket, ``None`` disables rate limiting and its
+        headers
+    ctx : Optional[GenerationContext]
+        The context whose caches are served, by default the current context
+    payloads : Optional[PayloadCache]
+        Where encoded users and guilds are cached. A server closes the payload
+        cache it creates when it is closed.
+    """
+
+    def __init__(
+        self,
+        guilds: Sequence[GuildData] = (),
+        *,
+        user: Optional[UserData] = None,
+        rate_limit: Optional[RateLimit] = RateLimit(),
+        ctx: Optional[GenerationContext] = None,
+        payloads: Optional[PayloadCache] = None,
+    ) -> None:
+        self.context = ctx or context.current()
+        # Payload caches created by the server are closed with it
+        self._owns_payloads = payloads is None
+        self.payloads = payloads or PayloadCache(self.context)
+        self.user = user
+        self.rate_limit = rate_limit
+        self.guilds: Dict[str, GuildData] = {}
+        for guild in guilds:
+            self.add_guild(guild)
+        self.channels: Dict[str, Tuple[TextChannelData, MessageHistory]] = {}
+
+        self._buckets: Dict[Tuple[str, str, str], _Bucket] = {}
+        # The sorted user IDs of every guild, for paginating its members
+        self._member_ids: Dict[str, List[int]] = {}
+        self.context.members.subscribe(self._members_changed)
+        self._server: Optional[asyncio.Server] = None
+        self._connections: Dict[asyncio.StreamWriter, "asyncio.Task[None]"] = {}
+
+    def add_guild(self, guild: GuildData) -> None:
+        """Serve a guild, replacing a served guild with the same ID"""
+        self.guilds[guild["id"]] = guild
+        self.payloads.invalidate(guild["id"])
+
+    def add_channel(
+        self, channel: TextChannelData, history: Optional[MessageHistory] = None
+    ) -> None:
+        """Serve a channel and its messages, replacing a served channel"""
+        id = str(channel["id"])
+        self.channels[id] = (channel, history or MessageHistory(id, ctx=self.context))
+
+    def _members_changed(self, id: Optional[str]) -> None:
+        if id is None:
+            self._member_ids.clear()
+        else:
+            self._member_ids.pop(id, None)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Start listening, a free port is picked by default"""
+        self._server = await asyncio.start_server(self._serve, host, port)
+
+    @property
+    def port(self) -> int:
+        """The port the server listens on"""
+        assert self._server is not None, "Server not started"
+        port: int = self._server.sockets[0].getsockname()[1]
+        return port
+
+    @property
+    def url(self) -> str:
+        """The base URL of the API, such as ``http://127.0.0.1:8080/api/v10``"""
+        assert self._server is not None, "Server not started"
+        host: str = self._server.sockets[0].getsockname()[0]
+        return f"http://{host}:{self.port}/api/v10"
+
+    async def close(self) -> None:
+        """Stop listening and stop watching the caches"""
+        self.context.members.unsubscribe(self._members_changed)
+        if self._owns_payloads:
+            self._owns_payloads = False
+            self.payloads.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # Open connections are closed too, instead of being cancelled later
+        for writer in self._connections:
+            writer.close()
+        await asyncio.gather(*self._connections.values(), return_exceptions=True)
+
+    async def __aenter__(self) -> RestServer:
+        if self._server is None:
+            await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections[writer] = task
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    writer.write(_BAD_REQUEST)
+                    break
+                headers: Dict[str, str] = {}
+                for line in lines[1:]:
+                    if line:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+
+                # Bodies are not used by any route but have to be consumed
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The end of the body is unknown, so the connection ends
+                    writer.write(_BAD_REQUEST)
+                    break
+                if length:
+                    await reader.readexactly(length)
+
+                keep_alive = headers.get("connection", "").lower() != "close" and (
+                    version == "HTTP/1.1"
+                    or headers.get("connection", "").lower() == "keep-alive"
+                )
+                writer.write(self._respond(method, target, headers, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[writer]
+            writer.close()
+
+    def _respond(
+        self, method: str, target: str, headers: Dict[str, str], keep_alive: bool
+    ) -> bytes:
+        url = urlsplit(target)
+        route, major, params = self._match(url.path)
+
+        extra: List[str] = []
+        if route is None:
+            status, body = _error(404, "404: Not Found")
+        elif method != "GET":
+            status, body = _error(405, "405: Method Not Allowed")
+        else:
+            limited = self._limit(headers.get("authorization", ""), route, major, extra)
+            if limited is not None:
+                status, body = limited
+            else:
+                status, body = self.handle(route, params, parse_qs(url.query))
+
+        reason = HTTPStatus(status).phrase
+        lines = [
+            f"HTTP/1.1 {status} {reason}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: keep-alive" if keep_alive else "Connection: close",
+            *extra,
+        ]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    @staticmethod
+    def _match(path: str) -> Tuple[Optional[str], str, List[str]]:
+        """Get the route template, major parameter and parameters of a path"""
+        parts = [part for part in path.split("/") if part]
+        if parts[:1] == ["api"]:
+            parts = parts[1:]
+            if parts and parts[0][:1] == "v" and parts[0][1:].isdigit():
+                parts = parts[1:]
+
+        if len(parts) < 2 or parts[0] not in ("users", "guilds", "channels"):
+            return None, "", []
+        params = parts[1::2]
+        template = "/".join(
+            part if index % 2 == 0 else "{id}" for index, part in enumerate(parts)
+        )
+        if template not in _ROUTES:
+            return None, "", []
+        major = params[0] if parts[0] != "users" else ""
+        return template, major, params
+
+    def _limit(
+        self, authorization: str, route: str, major: str, headers: List[str]
+    ) -> Optional[_Response]:
+        """Count a request against its bucket, adding the rate limit headers"""
+        if self.rate_limit is None:
+            return None
+
+        now = time.monotonic()
+        key = (authorization, route, major)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+        if now >= bucket.reset:
+            bucket.remaining = self.rate_limit.limit
+            bucket.reset = now + self.rate_limit.per
+
+        reset_after = bucket.reset - now
+        limited = bucket.remaining <= 0
+        if not limited:
+            bucket.remaining -= 1
+
+        headers += [
+            f"X-RateLimit-Limit: {self.rate_limit.limit}",
+            f"X-RateLimit-Remaining: {bucket.remaining}",
+            f"X-RateLimit-Reset: {time.time() + reset_after:.3f}",
+            f"X-RateLimit-Reset-After: {reset_after:.3f}",
+            f"X-RateLimit-Bucket: {_BUCKET_HASHES[route]}",
+        ]
+        if not limited:
+            return None
+
+        headers += [f"Retry-After: {reset_after:.3f}", "X-RateLimit-Scope: user"]
+        body = {
+            "message": "You are being rate limited.",
+            "retry_after": round(reset_after, 3),
+            "global": False,
+        }
+        return 429, dumps(body)
+
+    def handle(
+        self, route: str, params: List[str], query: Dict[str, List[str]]
+    ) -> _Response:
+        """Answer a request for a route template, such as ``guilds/{id}``
+
+        Returns
+        -------
+        Tuple[int, bytes]
+            The status code and JSON body of the response
+        """
+        if route == "users/{id}":
+            return self._user(params[0])
+        if route.startswith("channels/"):
+            return self._channel(route, params, query)
+
+        guild = self.guilds.get(params[0])
+        if guild is None:
+            return _not_found("Guild", 10004)
+        if route == "guilds/{id}":
+            return 200, self.payloads.guild(guild)
+        elif route == "guilds/{id}/roles":
+            return 200, dumps(guild["roles"])
+        elif route == "guilds/{id}/emojis":
+            return 200, dumps(guild["emojis"])
+        elif route == "guilds/{id}/emojis/{id}":
+            for emoji in guild["emojis"]:
+                if emoji["id"] == params[1]:
+                    return 200, dumps(emoji)
+            return _not_found("Emoji", 10014)
+        elif route == "guilds/{id}/members/{id}":
+            member = self.context.members.member(guild["id"], params[1])
+            if member is None:
+                return _not_found("Member", 10007)
+            return 200, dumps(member)
+        return self._members(guild["id"], query)
+
+    def _user(self, user_id: str) -> _Response:
+        if user_id == "@me" and self.user is not None:
+            return 200, dumps(self.user)
+        if user_id not in self.context.users:
+            return _not_found("User", 10013)
+        return 200, self.payloads.user(user_id)
+
+    def _channel(
+        self, route: str, params: List[str], query: Dict[str, List[str]]
+    ) -> _Response:
+        served = self.channels.get(params[0])
+        if served is None:
+            return _not_found("Channel", 10003)
+        channel, history = served
+        if route == "channels/{id}":
+            return 200, dumps(channel)
+        if route == "channels/{id}/messages/{id}":
+            message = history.get(params[1])
+            if message is None:
+                return _not_found("Message", 10008)
+            return 200, dumps(message)
+
+        anchors = {
+            name: query[name][0]
+            for name in ("before", "after", "around")
+            if name in query
+        }
+        try:
+            limit = int(query.get("limit", ["50"])[0])
+        except ValueError:
+            return _error(400, "Invalid Form Body", 50035)
+        if (
+            not 1 <= limit <= 100
+            or len(anchors) > 1
+            or not all(anchor.isdigit() for anchor in anchors.values())
+        ):
+            return _error(400, "Invalid Form Body", 50035)
+        return 200, dumps(history.history(limit, **anchors))
+
+    def _members(self, guild_id: str, query: Dict[str, List[str]]) -> _Response:
+        try:
+            limit = int(query.get("limit", ["1"])[0])
+            after = int(query.get("after", ["0"])[0])
+        except ValueError:
+            return _error(400, "Invalid Form Body", 50035)
+        if not 1 <= limit <= 1000:
+            return _error(400, "Invalid Form Body", 50035)
+
+        members = self.context.members.get(guild_id)
+        if members is None:
+            return 200, b"[]"
+
+        ids = self._member_ids.get(guild_id)
+        if ids is None:
+            ids = self._member_ids[guild_id] = sorted(map(int, members.user_ids()))
+        start = bisect.bisect_right(ids, after)
+        page = [members.find(str(id_)) for id_ in ids[start : start + limit]]
+        return 200, dumps(page)
+
+
+_ROUTES = frozenset(
+    (
+        "users/{id}",
+        "guilds/{id}",
+        "guilds/{id}/members",
+        "guilds/{id}/members/{id}",
+        "guilds/{id}/roles",
+        "guilds/{id}/emojis",
+        "guilds/{id}/emojis/{id}",
+        "channels/{id}",
+        "channels/{id}/messages",
+        "channels/{id}/messages/{id}",
+    )
+)
+
+# Bucket hashes are opaque, like Discord's
+_BUCKET_HASHES = {
+    route: hashlib.md5(route.encode("utf-8")).hexdigest()[:16] for route in _ROUTES
+}
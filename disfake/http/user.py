@@ -1,27 +1,41 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from discord_typings import UserData
 
-from ..core import cache
+from ..core import context, records
 from ..core.snowflake import Snowflake
 
 
 def generate(
-    snowflake: Snowflake = cache.snowflake, **kwargs: Dict[str, Any]
+    snowflake: Optional[Snowflake] = None, **kwargs: Dict[str, Any]
 ) -> UserData:
     """Generate a fake user
 
+    Parameters
+    ----------
+    snowflake
+        The snowflake generator to use, defaults to the one of the current
+        :class:`~disfake.core.context.GenerationContext`
+
     Returns
     -------
     UserData
         The generated user
     """
-    id_ = str(snowflake.snowflake())
-    user: UserData = {
-        "id": id_,
-        "username": f"User {id_}",
-        "discriminator": id_[-4:],
-        "avatar": None,
-    }
+    user = from_id((snowflake or context.current().snowflake).snowflake())
     user.update(kwargs)  # type: ignore
     return user
+
+
+def from_id(id: int) -> UserData:
+    """Build the fake user belonging to a snowflake
+
+    The same snowflake always results in the same user, see
+    :func:`disfake.core.records.user`.
+
+    Returns
+    -------
+    UserData
+        The user
+    """
+    return records.user(id)
@@ -0,0 +1,462 @@
+"""Binary snapshots of generated worlds
+
+A snapshot stores generated guilds together with the users, members and
+snowflake allocator state of a :class:`~disfake.core.context.GenerationContext`.
+Loading a snapshot memory-maps the file and only reads its small header, every
+guild, user and member is decoded when it is accessed.
+
+The file starts with a magic string and the length of a JSON header, followed
+by 8 byte aligned sections. ID and offset sections are arrays of unsigned 64
+bit integers in the byte order of the machine which wrote the snapshot, data
+sections are concatenated JSON documents. Users and members stored as
+:mod:`records <disfake.core.records>` are saved as their IDs only, and are
+restored as records when the snapshot is loaded.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from random import Random
+from types import TracebackType
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    overload,
+)
+
+from discord_typings import GuildData, GuildMemberData, UserData
+
+from disfake.core import context
+from disfake.core.cache import MemberCache, MemberSequence, UserCache
+from disfake.core.context import GenerationContext
+from disfake.core.records import MemberRecords
+from disfake.core.snowflake import Snowflake
+from disfake.http.guild import LazyMembers
+
+__all__ = ("Snapshot", "SnapshotMembers", "save", "load")
+
+MAGIC = b"DISFAKE\x00"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct("<Q")
+_ALIGN = 8
+
+_Path = Union[str, "os.PathLike[str]"]
+
+
+def _encode(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _encode_random(state: Tuple[Any, ...]) -> List[Any]:
+    version, internal, gauss_next = state
+    return [version, list(internal), gauss_next]
+
+
+def _decode_random(state: List[Any]) -> Tuple[Any, ...]:
+    version, internal, gauss_next = state
+    return (version, tuple(internal), gauss_next)
+
+
+class _Writer:
+    """Collects the sections of a snapshot"""
+
+    def __init__(self) -> None:
+        self.sections: Dict[str, Tuple[int, int]] = {}
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def add(self, name: str, data: bytes) -> None:
+        self.sections[name] = (self.size, len(data))
+        padding = -len(data) % _ALIGN
+        self.chunks.append(data + b"\x00" * padding)
+        self.size += len(data) + padding
+
+    def add_records(self, name: str, records: Iterable[bytes]) -> None:
+        """Add records as a ``<name>_offsets`` and ``<name>_data`` section"""
+        offsets = array("Q", [0])
+        data = bytearray()
+        for record in records:
+            data += record
+            offsets.append(len(data))
+        self.add(f"{name}_offsets", offsets.tobytes())
+        self.add(f"{name}_data", bytes(data))
+
+
+def save(
+    path: _Path,
+    guilds: Iterable[GuildData] = (),
+    ctx: Optional[GenerationContext] = None,
+) -> None:
+    """Write guilds and a generation context to a snapshot
+
+    Parameters
+    ----------
+    path : str | os.PathLike
+        Where to write the snapshot
+    guilds : Iterable[GuildData]
+        The guilds to store, in order
+    ctx : Optional[GenerationContext]
+        The context whose caches, snowflake generator and random generator are
+        stored, by default the current context
+    """
+    ctx = ctx or context.current()
+    writer = _Writer()
+
+    # Records are derived from their IDs and are not rendered
+    user_records = ctx.users.records
+    writer.add("user_record_ids", user_records.ids().tobytes())
+    users: List[Tuple[int, UserData]] = []
+    for user_id in ctx.users:
+        if user_id in user_records:
+            continue
+        user = ctx.users.get(user_id)
+        if user is not None:
+            users.append((int(user_id), user))
+    users.sort(key=lambda item: item[0])
+    writer.add("user_ids", array("Q", [id_ for id_, _ in users]).tobytes())
+    writer.add_records("user", (_encode(user) for _, user in users))
+
+    writer.add_records("guild", map(_encode, guilds))
+
+    # Indexed guilds store their members in order, together with the user IDs
+    # sorted for lookups and the position of each sorted ID
+    guild_members: List[List[Any]] = []
+    member_records: List[bytes] = []
+    member_ids = array("Q")
+    sorted_ids = array("Q")
+    positions = array("Q")
+    lazy_ids = array("Q")
+    record_ids = array("Q")
+    for id in ctx.members:
+        members = ctx.members.get(id)
+        if members is None:
+            continue
+        if isinstance(members, LazyMembers):
+            start = len(lazy_ids)
+            lazy_ids.extend(members.ids)
+            guild_members.append([id, "lazy", start, len(lazy_ids)])
+            continue
+        if isinstance(members, MemberRecords):
+            start = len(record_ids)
+            record_ids.extend(members.ids())
+            guild_members.append([id, "records", start, len(record_ids)])
+            continue
+
+        start = len(member_ids)
+        ids: List[int] = []
+        for member in members:
+            user = member.get("user")
+            assert user is not None, "Cached members need a user"
+            ids.append(int(user["id"]))
+            member_records.append(_encode(member))
+        member_ids.extend(ids)
+        order = sorted(range(len(ids)), key=ids.__getitem__)
+        sorted_ids.extend(ids[index] for index in order)
+        positions.extend(order)
+        guild_members.append([id, "members", start, len(member_ids)])
+
+    writer.add_records("member", member_records)
+    writer.add("member_ids", member_ids.tobytes())
+    writer.add("member_sorted_ids", sorted_ids.tobytes())
+    writer.add("member_positions", positions.tobytes())
+    writer.add("lazy_ids", lazy_ids.tobytes())
+    writer.add("record_ids", record_ids.tobytes())
+
+    snowflake = ctx.snowflake.getstate()
+    snowflake["random"] = _encode_random(snowflake["random"])
+    header = _encode(
+        {
+            "version": SNAPSHOT_VERSION,
+            "byteorder": sys.byteorder,
+            "sections": writer.sections,
+            "members": guild_members,
+            "snowflake": snowflake,
+            "random": _encode_random(ctx.random.getstate()),
+        }
+    )
+    header += b" " * (-(len(MAGIC) + _HEADER.size + len(header)) % _ALIGN)
+
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(_HEADER.pack(len(header)))
+        file.write(header)
+        for chunk in writer.chunks:
+            file.write(chunk)
+
+
+class _Records(Sequence[Any]):
+    """JSON records decoded on access"""
+
+    __slots__ = ("_mmap", "_offsets", "_base")
+
+    def __init__(self, buffer: mmap.mmap, offsets: memoryview, base: int) -> None:
+        self._mmap = buffer
+        self._offsets = offsets
+        self._base = base
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> Any:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Any]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("snapshot index out of range")
+        start = self._base + self._offsets[index]
+        end = self._base + self._offsets[index + 1]
+        return json.loads(self._mmap[start:end])
+
+
+class _SnapshotUsers(Mapping[str, UserData]):
+    """The users of a snapshot, looked up by binary search"""
+
+    def __init__(self, ids: memoryview, records: _Records) -> None:
+        self._ids = ids
+        self._records = records
+
+    def _find(self, user_id: object) -> Optional[int]:
+        if not isinstance(user_id, str) or not user_id.isdigit():
+            return None
+        id_ = int(user_id)
+        index = bisect.bisect_left(self._ids, id_)
+        if index < len(self._ids) and self._ids[index] == id_:
+            return index
+        return None
+
+    def __getitem__(self, user_id: str) -> UserData:
+        index = self._find(user_id)
+        if index is None:
+            raise KeyError(user_id)
+        return self._records[index]
+
+    def __contains__(self, user_id: object) -> bool:
+        return self._find(user_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return map(str, self._ids)
+
+
+class _MemberTable(NamedTuple):
+    """The members of all indexed guilds in a snapshot"""
+
+    records: _Records
+    ids: memoryview
+    # The user IDs of every guild sorted, and their position in the guild
+    sorted_ids: memoryview
+    positions: memoryview
+
+
+class SnapshotMembers(MemberSequence):
+    """The members of a guild in a :class:`Snapshot`, decoded on access
+
+    Every access decodes a new member object. Lookups by user ID are a binary
+    search.
+    """
+
+    __slots__ = ("_table", "_start", "_stop")
+
+    def __init__(self, table: _MemberTable, start: int, stop: int) -> None:
+        self._table = table
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    @overload
+    def __getitem__(self, index: int) -> GuildMemberData:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[GuildMemberData]:
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[GuildMemberData, List[GuildMemberData]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("member index out of range")
+        return self._table.records[self._start + index]
+
+    def find(self, user_id: str) -> Optional[GuildMemberData]:
+        if not user_id.isdigit():
+            return None
+        id_ = int(user_id)
+        sorted_ids = self._table.sorted_ids
+        index = bisect.bisect_left(sorted_ids, id_, self._start, self._stop)
+        if index == self._stop or sorted_ids[index] != id_:
+            return None
+        position = self._table.positions[index]
+        return self._table.records[self._start + position]
+
+    def user_ids(self) -> Iterator[str]:
+        ids = self._table.ids
+        return (str(ids[i]) for i in range(self._start, self._stop))
+
+
+class Snapshot:
+    """A memory-mapped snapshot written by :func:`save`
+
+    The snapshot has to stay open while its guilds and context are used.
+
+    Attributes
+    ----------
+    guilds : Sequence[GuildData]
+        The stored guilds, every access decodes a new guild object
+    context : GenerationContext
+        A context with the stored users, members, snowflake generator and
+        random generator. Users are added to its cache once they are read,
+        users and members stored as records are copied into memory as records.
+    """
+
+    def __init__(self, path: _Path) -> None:
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = []
+
+        try:
+            self._read_header()
+        except Exception:
+            self.close()
+            raise
+
+        table = _MemberTable(
+            self._records("member"),
+            self._ints("member_ids"),
+            self._ints("member_sorted_ids"),
+            self._ints("member_positions"),
+        )
+        self.guilds: Sequence[GuildData] = self._records("guild")
+
+        snowflake_state = dict(self._header["snowflake"])
+        snowflake_state["random"] = _decode_random(snowflake_state["random"])
+        snowflake = Snowflake(snowflake_state["worker"], snowflake_state["process"])
+        snowflake.setstate(snowflake_state)
+        random = Random()
+        random.setstate(_decode_random(self._header["random"]))
+
+        members = MemberCache()
+        lazy_ids = self._ints("lazy_ids")
+        record_ids = self._ints("record_ids")
+        for id, kind, start, stop in self._header["members"]:
+            if kind == "lazy":
+                members.set(id, LazyMembers(id, self._lazy_ids(lazy_ids, start, stop)))
+            elif kind == "records":
+                members.set(id, MemberRecords(id, record_ids[start:stop]))
+            else:
+                members.set(id, SnapshotMembers(table, start, stop))
+
+        users = UserCache(
+            source=_SnapshotUsers(self._ints("user_ids"), self._records("user"))
+        )
+        users.add_ids(self._ints("user_record_ids"))
+        self.context = GenerationContext(snowflake, users, members, random)
+
+    def _read_header(self) -> None:
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            raise ValueError("not a disfake snapshot")
+        (length,) = _HEADER.unpack_from(self._mmap, len(MAGIC))
+        self._data = len(MAGIC) + _HEADER.size + length
+        self._header: Dict[str, Any] = json.loads(
+            self._mmap[len(MAGIC) + _HEADER.size : self._data]
+        )
+        if self._header["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {self._header['version']}")
+        if self._header["byteorder"] != sys.byteorder:
+            raise ValueError("snapshot was written with a different byte order")
+
+    def _records(self, name: str) -> _Records:
+        offsets = self._ints(f"{name}_offsets")
+        return _Records(
+            self._mmap,
+            offsets,
+            self._data + self._header["sections"][f"{name}_data"][0],
+        )
+
+    def _ints(self, name: str) -> memoryview:
+        offset, length = self._header["sections"][name]
+        start = self._data + offset
+        view = memoryview(self._mmap)[start : start + length].cast("Q")
+        self._views.append(view)
+        return view
+
+    @staticmethod
+    def _lazy_ids(ids: memoryview, start: int, stop: int) -> Sequence[int]:
+        # Blocks of snowflakes from a single millisecond are a range again,
+        # which keeps member lookups O(1)
+        if stop > start and ids[stop - 1] - ids[start] == stop - start - 1:
+            return range(ids[start], ids[stop - 1] + 1)
+        return array("Q", ids[start:stop])
+
+    def close(self) -> None:
+        """Unmap the snapshot, its guilds and uncached entities can no longer
+        be read"""
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def load(path: _Path) -> Snapshot:
+    """Open a snapshot written by :func:`save`
+
+    Only the header of the snapshot and the IDs of records are read,
+    everything else is decoded on access. Use :func:`disfake.core.context.use` to generate with the stored
+    context.
+
+    Parameters
+    ----------
+    path : str | os.PathLike
+        The snapshot to open
+
+    Returns
+    -------
+    Snapshot
+        The opened snapshot, to be closed once it is no longer used
+    """
+    return Snapshot(path)
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import itertools
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from discord_typings import GuildData
+
+from disfake.core import context
+from disfake.core.records import MemberRecords
+from disfake.core.snowflake import PROCESS_MAX, WORKER_MAX, Snowflake
+from disfake.http import guild
+
+__all__ = ("generate_guilds", "generate_world", "partition_snowflake", "MAX_PARTITIONS")
+
+# Every partition gets its own worker and process ID, (0, 0) is left to the
+# global snowflake generator
+MAX_PARTITIONS = (WORKER_MAX + 1) * (PROCESS_MAX + 1) - 1
+
+# The guilds, user IDs and member user IDs of every guild of a partition
+_Partition = Tuple[List[GuildData], Sequence[int], Dict[str, Sequence[int]]]
+
+
+def partition_snowflake(partition: int) -> Snowflake:
+    """Get the snowflake generator of a partition
+
+    Partitions are numbered from 0 to :data:`MAX_PARTITIONS` - 1 and never
+    issue the same snowflakes, as each has a distinct worker and process ID.
+    """
+    if not 0 <= partition < MAX_PARTITIONS:
+        raise ValueError(f"partition must be between 0 and {MAX_PARTITIONS - 1}")
+    index = partition + 1
+    return Snowflake(index // (PROCESS_MAX + 1), index % (PROCESS_MAX + 1))
+
+
+def _generate_partition(
+    partition: int,
+    count: int,
+    member_count: int,
+    emoji_count: int,
+    role_count: int,
+    lazy_members: bool,
+    seed: Optional[Union[int, str]],
+) -> _Partition:
+    snowflake = partition_snowflake(partition)
+    if seed is None:
+        partition_context = context.GenerationContext(snowflake)
+    else:
+        # Every partition can be regenerated on its own
+        partition_context = context.GenerationContext.seeded(
+            f"{seed}/{partition}", worker=snowflake.worker, process=snowflake.process
+        )
+    with context.use(partition_context) as ctx:
+        guilds = [
+            guild.generate(
+                None,
+                member_count,
+                emoji_count,
+                role_count,
+                lazy_members=lazy_members,
+                compact_members=not lazy_members,
+            )
+            for _ in range(count)
+        ]
+
+    # Users and members are derived from their IDs, only the IDs are sent back
+    members: Dict[str, Sequence[int]] = {}
+    for id in ctx.members:
+        cached = ctx.members.get(id)
+        if isinstance(cached, MemberRecords):
+            members[id] = cached.ids()
+        elif isinstance(cached, guild.LazyMembers):
+            members[id] = cached.ids
+    return guilds, ctx.users.records.ids(), members
+
+
+def generate_guilds(
+    count: int,
+    member_count: int = 0,
+    emoji_count: int = 0,
+    role_count: int = 0,
+    *,
+    lazy_members: bool = False,
+    processes: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    seed: Optional[Union[int, str]] = None,
+) -> List[GuildData]:
+    """Generate many guilds in a pool of processes
+
+    The guilds are split into partitions, every partition is generated in its
+    own process with its own snowflake generator, see
+    :func:`partition_snowflake`. Partitions only send back the IDs of their
+    users and members, which are merged into the caches of the current
+    :class:`~disfake.core.context.GenerationContext` as
+    :class:`~disfake.core.records.UserRecords` and
+    :class:`~disfake.core.records.MemberRecords`, or as
+    :class:`~disfake.http.guild.LazyMembers` with ``lazy_members``.
+
+    Parameters
+    ----------
+    count : int
+        The amount of guilds to generate
+    member_count, emoji_count, role_count : int
+        Passed to :func:`disfake.http.guild.generate` for every guild
+    lazy_members : bool
+        Passed to :func:`disfake.http.guild.generate` for every guild
+    processes : Optional[int]
+        The amount of processes to use, defaults to the amount of CPUs
+    chunk_size : Optional[int]
+        The amount of guilds per partition, by default there are four
+        partitions per process
+    seed : Optional[Union[int, str]]
+        Seed every partition with :meth:`GenerationContext.seeded
+        <disfake.core.context.GenerationContext.seeded>`. The same seed and
+        parameters always give the same guilds, as long as the amount of
+        partitions is the same, so pass a fixed ``chunk_size`` too.
+
+    Returns
+    -------
+    List[GuildData]
+        The generated guilds
+    """
+    processes = processes or os.cpu_count() or 1
+    chunk_size = max(
+        chunk_size or math.ceil(count / (processes * 4)),
+        math.ceil(count / MAX_PARTITIONS),
+        1,
+    )
+    counts = [min(chunk_size, count - start) for start in range(0, count, chunk_size)]
+
+    ctx = context.current()
+    guilds: List[GuildData] = []
+    user_ids: List[Sequence[int]] = []
+    with ProcessPoolExecutor(processes) as pool:
+        partitions = pool.map(
+            _generate_partition,
+            range(len(counts)),
+            counts,
+            [member_count] * len(counts),
+            [emoji_count] * len(counts),
+            [role_count] * len(counts),
+            [lazy_members] * len(counts),
+            [seed] * len(counts),
+        )
+        for partition_guilds, users, members in partitions:
+            guilds.extend(partition_guilds)
+            user_ids.append(users)
+            for id, member_ids in members.items():
+                if lazy_members:
+                    ctx.members.set(id, guild.LazyMembers(id, member_ids))
+                else:
+                    ctx.members.add_ids(id, member_ids)
+
+    # The IDs of different partitions interleave, so they are sorted once
+    ctx.users.add_ids(array("Q", itertools.chain.from_iterable(user_ids)))
+
+    return guilds
+
+
+# Weighted draws which add fewer new users than this fraction of the missing
+# users are replaced by uniform draws
+_MIN_YIELD = 0.05
+
+
+def _sample(
+    rng: Random, ids: Sequence[int], cum_weights: Sequence[float], k: int
+) -> List[int]:
+    """Draw ``k`` distinct users, each draw weighted by popularity"""
+    chosen: Set[int] = set()
+    while len(chosen) < k:
+        missing = k - len(chosen)
+        chosen.update(rng.choices(ids, cum_weights=cum_weights, k=missing))
+        if k - len(chosen) > missing * (1 - _MIN_YIELD):
+            # Only popular users are left to draw, the rest is drawn uniformly
+            while len(chosen) < k:
+                chosen.update(rng.sample(ids, k - len(chosen)))
+    # Set order depends on the draws only, sorting keeps seeded worlds stable
+    # across Python versions
+    members = sorted(chosen)
+    owner = members.pop(rng.randrange(len(members)))
+    return [owner, *members]
+
+
+def generate_world(
+    guild_count: int,
+    user_count: int,
+    member_count: Union[int, Sequence[int]] = 0,
+    *,
+    popularity: float = 1.0,
+    emoji_count: int = 0,
+    role_count: int = 0,
+) -> List[GuildData]:
+    """Generate guilds whose members are drawn from a shared user population
+
+    Unlike :func:`generate_guilds`, users are members of many guilds. Users
+    are drawn with Zipf-like weights: the user of rank ``r``, in the order the
+    users were created, is picked with a weight of ``1 / r ** popularity``.
+    Every guild has distinct members, one of which owns the guild.
+
+    The users are stored as :class:`~disfake.core.records.UserRecords` and the
+    members as :class:`~disfake.core.records.MemberRecords`, so a membership
+    costs 8 bytes besides its entry in the index of the guilds of every user.
+    Everything is added to the caches of the current
+    :class:`~disfake.core.context.GenerationContext` and drawn from its random
+    generator, so seeded contexts give the same world.
+
+    Parameters
+    ----------
+    guild_count : int
+        The amount of guilds to generate
+    user_count : int
+        The amount of users to generate
+    member_count : Union[int, Sequence[int]]
+        The amount of members besides the owner, of every guild or of each
+        guild. Guilds have at most ``user_count`` members.
+    popularity : float
+        The exponent of the popularity weights, ``0`` draws all users equally
+        often and higher values concentrate the members on fewer users
+    emoji_count, role_count : int
+        Passed to :func:`disfake.http.guild.generate` for every guild
+
+    Returns
+    -------
+    List[GuildData]
+        The generated guilds
+    """
+    counts = (
+        [member_count] * guild_count
+        if isinstance(member_count, int)
+        else list(member_count)
+    )
+    if len(counts) != guild_count:
+        raise ValueError("member_count needs a count for every guild")
+    if user_count < 1 and guild_count:
+        raise ValueError("user_count must be at least 1")
+
+    ctx = context.current()
+    ids = array("Q", ctx.snowflake.block(user_count))
+    ctx.users.add_ids(ids)
+    cum_weights = array(
+        "d",
+        itertools.accumulate(rank**-popularity for rank in range(1, user_count + 1)),
+    )
+
+    return [
+        guild.generate(
+            None,
+            emoji_count=emoji_count,
+            role_count=role_count,
+            compact_members=True,
+            member_ids=_sample(
+                ctx.random, ids, cum_weights, min(count + 1, user_count)
+            ),
+        )
+        for count in counts
+    ]
@@ -1,13 +1,18 @@
+import json
+import sys
 from typing import Any
 
 import pytest
 import typeguard
-from discord_typings import GuildCreateData, GuildData, UserData
+from discord_typings import GuildCreateData, GuildData, ReadyEvent, UserData
 from typing_extensions import NotRequired, get_origin, is_typeddict
 
+from disfake.core.encoding import dumps
+from disfake.core.generator import _get_factory  # pyright: ignore[reportPrivateUsage]
 from disfake.core.generator import (
     _get_type_hints,  # pyright: ignore[reportPrivateUsage]
 )
+from disfake.core.generator import LazyObject, generate, generate_many
 from disfake.core.snowflake import Snowflake
 from disfake.gateway.promotors import promote_guild
 from disfake.http import guild, user
@@ -45,3 +50,45 @@ def test_guild(snowflake: Snowflake) -> None:
 
 def test_promoted_guild() -> None:
     _check("Guild", GuildCreateData, promote_guild(guild.generate()))
+
+
+def test_factory_cached() -> None:
+    factory = _get_factory(GuildData)
+    assert _get_factory(GuildData) is factory, "Factory was not cached"
+
+    first, second = generate(GuildData), generate(GuildData)
+    assert first["roles"] is not second["roles"], "Generated objects share state"
+
+
+def test_hints_without_reload() -> None:
+    module = sys.modules[GuildData.__module__]
+    assert generate(ReadyEvent)["t"] == "READY", "Generic arguments not resolved"
+    assert module.GuildData is GuildData, "Module was reloaded"
+
+
+def test_generate_many() -> None:
+    guilds = generate_many(GuildData, 3)
+    assert len(guilds) == 3, "Wrong number of objects generated"
+    assert all(data.keys() == generate(GuildData).keys() for data in guilds)
+    assert guilds[0]["roles"] is not guilds[1]["roles"], "Objects share state"
+
+    _check("Guild", GuildData, guilds[0])
+
+
+def test_generate_lazy() -> None:
+    lazy = generate(ReadyEvent, lazy=True)
+    assert isinstance(lazy, LazyObject)
+    assert lazy["t"] == "READY"
+    data = lazy["d"]
+    assert isinstance(data, LazyObject), "Nested object not lazy"
+    assert lazy["d"] is data, "Field not memoized"
+    assert data["user"]["id"] is data["user"]["id"]
+
+    eager = lazy.to_dict()
+    assert type(eager["d"]["user"]) is dict
+    assert eager == lazy and eager.keys() == generate(ReadyEvent).keys()
+    assert json.loads(dumps(lazy)) == eager == json.loads(json.dumps(lazy.to_dict()))
+
+    guilds = generate_many(GuildData, 3, lazy=True)
+    assert len({id(guild["roles"]) for guild in guilds}) == 3
+    assert dict(guilds[0]).keys() == generate(GuildData).keys()
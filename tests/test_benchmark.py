@@ -0,0 +1,20 @@
+import json
+from dataclasses import asdict
+
+from disfake import benchmark
+
+
+def test_benchmark_run() -> None:
+    selected = [case for case in benchmark.cases() if case.name == "guild.generate[10]"]
+    (result,) = benchmark.run(selected, min_time=0)
+
+    assert result.calls == 1
+    assert result.ops_per_sec > 0
+    assert result.p50 <= result.p99
+    assert result.peak_memory > 0, "Memory not traced"
+
+    baseline = {"results": [{**asdict(result), "ops_per_sec": result.ops_per_sec * 2}]}
+    assert benchmark.compare(
+        [result], json.loads(json.dumps(baseline))
+    ), "Regression not found"
+    assert not benchmark.compare([result], {"results": [asdict(result)]})
@@ -0,0 +1,84 @@
+import time
+from typing import List, Optional
+
+from disfake.core import cache
+from disfake.core.cache import EvictionPolicy, MemberCache, UserCache
+from disfake.core.snowflake import Snowflake
+from disfake.http import guild, user
+
+
+def test_lru_users() -> None:
+    snowflake = Snowflake(2, 0)
+    users = UserCache(EvictionPolicy(max_entries=2, regenerate=False))
+    first, second, third = (user.generate(snowflake) for _ in range(3))
+
+    users.add(first)
+    users.add(second)
+    assert users.get(first["id"]) == first
+    users.add(third)
+
+    assert len(users) == 2, "Cache not bounded"
+    assert users.get(second["id"]) is None, "Least recently used user not evicted"
+    assert users.get(first["id"]) == first
+
+
+def test_regenerate_users() -> None:
+    snowflake = Snowflake(2, 0)
+    users = UserCache(EvictionPolicy(max_bytes=1, regenerate=True))
+    evicted, kept = user.generate(snowflake), user.generate(snowflake)
+
+    users.add(evicted)
+    users.add(kept)
+    assert len(users) == 1, "User not evicted"
+    assert evicted["id"] in users, "Regenerated user not contained"
+    assert users.get(evicted["id"]) == evicted, "Evicted user not regenerated"
+    assert users.get(str(snowflake.snowflake())) is None, "Unknown user regenerated"
+
+
+def test_evicted_users_bounded() -> None:
+    snowflake = Snowflake(2, 0)
+    users = UserCache(EvictionPolicy(max_entries=10, regenerate=True))
+    notified: List[Optional[str]] = []
+    users.subscribe(notified.append)
+    generated = [user.generate(snowflake) for _ in range(100)]
+    for user_ in generated:
+        users.add(user_)
+
+    # Every user is notified once added and once evicted
+    assert len(notified) == 100 + 90, "Evictions not notified"
+    evicted = users._evicted  # pyright: ignore[reportPrivateUsage]
+    assert len(evicted) == 10, "Evicted IDs not bounded"
+    assert generated[80]["id"] in users and generated[79]["id"] not in users
+
+
+def test_eviction_scales() -> None:
+    snowflake = Snowflake(2, 0)
+    users = UserCache(EvictionPolicy(max_entries=1_000))
+    generated = [user.generate(snowflake) for _ in range(20_000)]
+
+    start = time.perf_counter()
+    for user_ in generated:
+        users.add(user_)
+    assert time.perf_counter() - start < 2, "Eviction not linear"
+    assert len(users) == 1_000, "Cache not bounded"
+    assert generated[-1]["id"] in users and generated[-1_001]["id"] not in users
+
+
+def test_ttl_users() -> None:
+    users = UserCache(EvictionPolicy(ttl=0.01, regenerate=False))
+    users.add(user.generate(Snowflake(2, 0)))
+
+    time.sleep(0.02)
+    assert users.get(next(iter(users))) is None, "Expired user returned"
+
+
+def test_member_eviction() -> None:
+    members = MemberCache(EvictionPolicy(max_entries=3))
+    snowflake = Snowflake(2, 1)
+    first = guild.generate(snowflake, member_count=1)
+    second = guild.generate(snowflake, member_count=1)
+
+    members.set(first["id"], list(cache.members.get(first["id"]) or []))
+    members.set(second["id"], list(cache.members.get(second["id"]) or []))
+    assert first["id"] not in members, "Oldest guild not evicted"
+    assert members.member(second["id"], second["owner_id"]) is not None
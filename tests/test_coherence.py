@@ -42,3 +42,50 @@ def test_members(guild: disfake.http.guild.GuildData) -> None:
     assert members is not None, "Guild members unavailable"
 
     assert len(members) == 2, "Guild members not generated"
+
+
+def test_lazy_members(snowflake: Snowflake) -> None:
+    guild = disfake.http.guild.generate(
+        snowflake, member_count=250_000, lazy_members=True
+    )
+    members = cache.members.get(guild["id"])
+    assert isinstance(members, disfake.http.guild.LazyMembers)
+
+    assert len(members) == 250_001, "Guild members not generated"
+    assert members[0].get("user") == cache.users.get(guild["owner_id"])
+    assert members[-1].get("user") == cache.users.get(str(members.ids[-1]))
+    assert [member.get("user") for member in members[10:12]] == [
+        members[10].get("user"),
+        members[11].get("user"),
+    ], "Slicing is inconsistent"
+
+    last = str(members.ids[-1])
+    found = members.find(last)
+    assert found is not None and found.get("user", {}).get("id") == last
+    assert members.find(str(members.ids[-1] + 1)) is None, "Non member found"
+
+    # Removing a member does not materialize the guild
+    assert cache.members.remove(guild["id"], last) is not None
+    assert cache.members.get(guild["id"]) is members
+    assert len(members) == 250_000 and members.find(last) is None
+
+
+def test_member_index(snowflake: Snowflake) -> None:
+    cache.users.clear()
+    cache.members.clear()
+
+    first = disfake.http.guild.generate(snowflake, member_count=2)
+    second = disfake.http.guild.generate(snowflake, member_count=2, lazy_members=True)
+
+    user = cache.users.get(first["owner_id"])
+    assert user is not None
+    member = cache.members.member(first["id"], user["id"])
+    assert member is not None, "Member lookup failed"
+    cache.members.add(second["id"], member)
+
+    assert cache.members.guilds_of(user["id"]) == {first["id"], second["id"]}
+
+    assert cache.members.remove(first["id"], user["id"]) is not None
+    assert cache.members.member(first["id"], user["id"]) is None
+    assert cache.members.guilds_of(user["id"]) == {second["id"]}
+    assert len(cache.members.get(first["id"]) or []) == 2, "Member not removed"
@@ -0,0 +1,58 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Set
+
+from disfake.core import cache, context
+from disfake.core.snowflake import Snowflake
+from disfake.http import guild, user
+
+
+def test_threads_share_snowflake() -> None:
+    snowflake = Snowflake(3, 0)
+
+    def generate(_: int) -> List[str]:
+        return [user.generate(snowflake)["id"] for _ in range(1000)]
+
+    with ThreadPoolExecutor(8) as pool:
+        ids = [id_ for chunk in pool.map(generate, range(8)) for id_ in chunk]
+    assert len(set(ids)) == len(ids), "Duplicate snowflakes issued"
+
+
+def test_isolated_tasks() -> None:
+    async def generate(worker: int) -> Set[str]:
+        with context.isolated(worker) as ctx:
+            await asyncio.sleep(0)
+            generated = guild.generate(member_count=5)
+            await asyncio.sleep(0)
+            assert len(ctx.members.get(generated["id"]) or []) == 6
+            assert generated["owner_id"] not in cache.users, "Global cache used"
+            return set(ctx.users)
+
+    async def main() -> List[Set[str]]:
+        return await asyncio.gather(*(generate(worker) for worker in range(4)))
+
+    worlds = asyncio.run(main())
+    assert all(len(world) == 6 for world in worlds), "Caches were shared"
+    assert context.current() is context.GLOBAL
+
+
+def test_seeded_reproducible() -> None:
+    def generate() -> str:
+        with context.isolated(seed=42):
+            generated = guild.generate(member_count=5, role_count=3)
+            return json.dumps(generated, sort_keys=True)
+
+    assert generate() == generate(), "Seeded output differs"
+    with context.isolated(seed=43):
+        other = json.dumps(guild.generate(member_count=5, role_count=3))
+    assert other != generate(), "Seed ignored"
+
+
+def test_seeded_disjoint() -> None:
+    def generate(seed: int) -> Set[str]:
+        with context.isolated(seed=seed) as ctx:
+            guild.generate(member_count=10_000, role_count=3)
+            return set(ctx.users) | set(ctx.members)
+
+    assert not generate(1) & generate(2), "Seeds share snowflakes"
@@ -0,0 +1,43 @@
+import json
+
+from disfake.core import context, encoding
+from disfake.gateway import events
+from disfake.http import guild
+
+
+def test_encoded_event() -> None:
+    event = events.resumed()
+    encoded = encoding.EncodedEvent(event)
+    assert json.loads(encoded.encode(5)) == {**event, "s": 5}
+    assert json.loads(encoded.encode()) == {**event, "s": None}
+    assert encoding.EncodedEvent({}).encode(1) == b'{"s":1}'
+
+
+def test_payload_cache() -> None:
+    with context.isolated(seed=3) as ctx:
+        generated = guild.generate(member_count=3)
+        payloads = encoding.PayloadCache()
+
+        create = payloads.guild_create(generated, include_members=True)
+        assert payloads.guild_create(generated, include_members=True) is create
+        decoded = json.loads(create.encode(1))
+        assert len(decoded["d"]["members"]) == 4, "Members not encoded"
+
+        owner = ctx.users.get(generated["owner_id"])
+        assert owner is not None
+        ready = payloads.ready(owner)
+        user = payloads.user(owner["id"])
+        assert json.loads(user) == owner
+
+        # Changing the members drops the GUILD_CREATE event only
+        ctx.members.remove(generated["id"], owner["id"])
+        assert payloads.ready(owner) is ready
+        create = payloads.guild_create(generated, include_members=True)
+        assert len(json.loads(create.encode(2))["d"]["members"]) == 3
+
+        # Replacing the user drops everything built from it
+        ctx.users.add({**owner, "username": "changed"})
+        assert payloads.ready(owner) is not ready
+        assert json.loads(payloads.user(owner["id"]))["username"] == "changed"
+
+        payloads.close()
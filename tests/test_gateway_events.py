@@ -1,6 +1,13 @@
+from disfake.core import cache
+from disfake.core.snowflake import Snowflake
 from disfake.gateway import events
 from disfake.gateway.events import __all__ as event_names
-from disfake.http import user
+from disfake.gateway.promotors import (
+    guild_create_view,
+    promote_guild,
+    promote_large_guild,
+)
+from disfake.http import guild, user
 
 
 def test_ready() -> None:
@@ -9,5 +16,42 @@ def test_ready() -> None:
 
 def test_other() -> None:
     for event in event_names:
-        if event != "ready":
+        if event not in ("ready", "typing_start", "guild_members_chunks"):
             assert getattr(events, event)()
+
+
+def test_large_guild() -> None:
+    large = guild.generate(Snowflake(1, 0), member_count=2_499, lazy_members=True)
+    data, chunks = promote_large_guild(large, large_threshold=100, chunk_size=1000)
+
+    assert data["large"], "Guild not marked as large"
+    assert data["member_count"] == 2_500
+    assert len(data["members"]) == 100, "Members in GUILD_CREATE not capped"
+
+    received = [chunk["d"] for chunk in chunks]
+    assert [chunk["chunk_index"] for chunk in received] == [0, 1, 2]
+    assert all(chunk["chunk_count"] == 3 for chunk in received)
+
+    members = [member for chunk in received for member in chunk["members"]]
+    assert members == list(cache.members.get(large["id"]) or [])[100:]
+
+
+def test_guild_create_view() -> None:
+    generated = guild.generate(Snowflake(2, 0), member_count=3, role_count=1)
+    original = dict(generated)
+    views = [guild_create_view(generated, include_members=True) for _ in range(3)]
+
+    view = views[0]
+    assert view["members"] is cache.members.get(generated["id"]), "Members copied"
+    assert view["roles"] is generated["roles"], "Guild copied"
+    assert view.to_dict() == promote_guild(generated, include_members=True)
+
+    view["name"] = "Renamed"
+    del view["roles"]
+    assert view["name"] == "Renamed" and "roles" not in view
+    assert views[1]["name"] == generated["name"] and "roles" in views[1]
+    assert generated == original, "Guild mutated through its view"
+
+    payload = views[1].to_dict()
+    payload["roles"].append(payload["roles"][0])
+    assert len(generated["roles"]) == 2, "Roles list shared with the payload"
@@ -0,0 +1,67 @@
+from typing import List
+
+from discord_typings import ChannelMessageData
+
+from disfake.core import context
+from disfake.core.snowflake import to_datetime
+from disfake.http import channel
+from disfake.http.message import MessageHistory
+
+
+def _ids(messages: List[ChannelMessageData]) -> List[int]:
+    return [int(message["id"]) for message in messages]
+
+
+def test_history() -> None:
+    with context.isolated(seed=4) as ctx:
+        generated = channel.generate(guild_id="1")
+        history = MessageHistory(str(generated["id"]), [1, 2, 3], 1_000_000)
+        ids = history.ids
+
+        assert len(history) == 1_000_000
+        assert all(ids[i] < ids[i + 1] for i in range(0, 999_999, 997))
+        assert to_datetime(ids[-1]).timestamp() <= ctx.snowflake.time()
+
+        latest = history.history(3)
+        assert _ids(latest) == [ids[-1], ids[-2], ids[-3]], "Not newest first"
+        assert latest[0]["author"]["id"] in ("1", "2", "3")
+        assert history.get(str(ids[-1])) == latest[0]
+
+        middle = str(ids[500_000])
+        assert _ids(history.history(2, before=middle)) == [ids[499_999], ids[499_998]]
+        assert _ids(history.history(2, after=middle)) == [ids[500_002], ids[500_001]]
+        assert _ids(history.history(4, around=middle)) == [
+            ids[500_001],
+            ids[500_000],
+            ids[499_999],
+            ids[499_998],
+        ]
+        assert _ids(history.history(5, before=str(ids[2]))) == [ids[1], ids[0]]
+
+        # Deleted messages are skipped, new messages come last
+        assert history.remove(str(ids[499_999])) is not None
+        assert str(ids[499_999]) not in history
+        assert _ids(history.history(2, before=middle)) == [ids[499_998], ids[499_997]]
+        sent = history.append(content="hello")
+        assert history.history(1)[0] == sent and sent["content"] == "hello"
+        assert len(history) == 1_000_000
+
+
+def test_dense_history() -> None:
+    with context.isolated(seed=5) as ctx:
+        now = ctx.snowflake.time()
+        history = MessageHistory("1", [1], 30_000_000, start=now - 3600)
+        ids = history.ids
+
+        assert all(ids[i] < ids[i + 1] for i in range(0, 29_999_999, 99_991))
+        assert to_datetime(ids[-1]).timestamp() < now, "Messages in the future"
+        assert to_datetime(ids[0]).timestamp() < now - 3600, "Start not moved back"
+        assert int(history.append()["id"]) > ids[29_999_999], "Message not appended"
+
+
+def test_histories_disjoint() -> None:
+    with context.isolated() as ctx:
+        first = MessageHistory("1", [1], 1000)
+        second = MessageHistory("2", [1], 1000)
+        assert not set(first.ids) & set(second.ids), "Histories share IDs"
+        assert ctx.snowflake.snowflake() > max(first.ids[-1], second.ids[-1])
@@ -0,0 +1,71 @@
+from array import array
+
+from disfake.core import context
+from disfake.core.cache import EvictionPolicy, MemberCache
+from disfake.core.records import MemberRecords, UserRecords, member, user
+from disfake.http import guild
+
+
+def test_user_records() -> None:
+    records = UserRecords([30, 10])
+    records.extend([20, 40])
+    assert list(records) == ["10", "20", "30", "40"], "IDs not sorted"
+    assert records["20"] == user(20)
+    assert "25" not in records and "abc" not in records
+
+    assert records.discard(20) and not records.discard(20)
+    assert len(records) == 3
+
+
+def test_member_records() -> None:
+    members = MemberRecords("1", range(100, 105))
+    assert isinstance(members.ids(), array)
+    assert members.find("102") == member(user(102), "1")
+    assert members.find("99") is None
+    assert members[-1] == member(user(104), "1")
+    assert members[1:3] == [member(user(101), "1"), member(user(102), "1")]
+
+
+def test_compact_guild() -> None:
+    with context.isolated(seed=2) as ctx:
+        generated = guild.generate(member_count=100, compact_members=True)
+        members = ctx.members.get(generated["id"])
+        assert isinstance(members, MemberRecords)
+        assert len(members) == len(ctx.users) == 101
+
+        owner = ctx.users.get(generated["owner_id"])
+        assert owner is not None and owner == user(int(owner["id"]))
+        assert ctx.members.guilds_of(owner["id"]) == {generated["id"]}
+
+        # Removing a member does not materialize the guild
+        assert ctx.members.remove(generated["id"], owner["id"]) is not None
+        assert ctx.members.get(generated["id"]) is members
+        assert len(members) == 100
+        assert not ctx.members.guilds_of(owner["id"]), "Removed member indexed"
+
+        ctx.members.add_ids(generated["id"], [int(owner["id"])])
+        assert ctx.members.member(generated["id"], owner["id"]) is not None
+        assert ctx.members.guilds_of(owner["id"]) == {generated["id"]}
+        # Records guilds are indexed by user instead of searched
+        assert not ctx.members._external  # pyright: ignore[reportPrivateUsage]
+
+        # Added users replace their records
+        ctx.users.add({**owner, "username": "changed"})
+        assert len(ctx.users) == 101
+        assert ctx.users.get(owner["id"]) == {**owner, "username": "changed"}
+        assert ctx.users.remove(owner["id"]) is not None
+        assert ctx.users.remove(str(members.ids()[-1])) is not None
+        assert len(ctx.users) == 99
+
+
+def test_member_records_eviction() -> None:
+    members = MemberCache(EvictionPolicy(max_bytes=5_000))
+    members.add_ids("1", range(1_000, 2_000))
+    members.add_ids("2", range(10))
+    assert "1" not in members, "Size of records not counted"
+
+    evictor = members._evictor  # pyright: ignore[reportPrivateUsage]
+    assert evictor is not None
+    size = evictor.bytes
+    members.remove("2", "5")
+    assert evictor.bytes == size - 8, "Removed member still counted"
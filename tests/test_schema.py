@@ -0,0 +1,35 @@
+from importlib import metadata
+from pathlib import Path
+
+from discord_typings import GuildData
+
+from disfake.core import schema
+from disfake.core.generator import _compile  # pyright: ignore[reportPrivateUsage]
+from disfake.core.generator import _Factory  # pyright: ignore[reportPrivateUsage]
+from disfake.core.generator import _get_factory  # pyright: ignore[reportPrivateUsage]
+
+
+def test_snapshot_up_to_date() -> None:
+    assert schema.load() == schema.build()["types"], (
+        "The bundled schema snapshot is outdated, "
+        "run `python -m disfake.core.schema`"
+    )
+
+
+def test_snapshot_matches_introspection() -> None:
+    live = _Factory(GuildData)
+    _compile(live)
+
+    factory = _get_factory(GuildData)
+    assert isinstance(factory.type_, str), "GuildData not loaded from the snapshot"
+    assert factory().keys() == live().keys()
+    assert factory.required_keys == live.required_keys
+
+
+def test_snapshot_version(tmp_path: Path) -> None:
+    snapshot = schema.build()
+    assert snapshot["discord_typings"] == metadata.version("discord-typings")
+
+    path = tmp_path / "schema.json"
+    schema.dump({**snapshot, "discord_typings": "0.0.0"}, path)
+    assert schema.load(path) == {}, "Snapshot of another version loaded"
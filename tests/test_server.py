@@ -0,0 +1,134 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Tuple
+
+from disfake.core import context
+from disfake.http import channel, guild
+from disfake.http.message import MessageHistory
+from disfake.http.server import RateLimit, RestServer
+
+Response = Tuple[int, Dict[str, str], Any]
+
+
+async def _read(reader: asyncio.StreamReader) -> Response:
+    head = (await reader.readuntil(b"\r\n\r\n")).decode().split("\r\n")
+    headers: Dict[str, str] = {}
+    for line in head[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(headers["content-length"]))
+    return int(head[0].split()[1]), headers, json.loads(body)
+
+
+async def _get(server: RestServer, paths: List[str]) -> List[Response]:
+    # All requests are pipelined over one connection
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(
+        b"".join(
+            f"GET /api/v10{path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode()
+            for path in paths
+        )
+    )
+    responses = [await _read(reader) for _ in paths]
+    writer.close()
+    return responses
+
+
+def test_rest_routes() -> None:
+    async def run() -> None:
+        with context.isolated(seed=6) as ctx:
+            generated = guild.generate(member_count=5, emoji_count=1, role_count=1)
+            members = ctx.members.get(generated["id"])
+            assert members is not None
+            ids = sorted(members.user_ids(), key=int)
+            emoji_id = generated["emojis"][0]["id"]
+
+            async with RestServer([generated]) as server:
+                responses = await _get(
+                    server,
+                    [
+                        f"/users/{generated['owner_id']}",
+                        f"/guilds/{generated['id']}",
+                        f"/guilds/{generated['id']}/members?limit=2&after={ids[1]}",
+                        f"/guilds/{generated['id']}/members/{ids[3]}",
+                        f"/guilds/{generated['id']}/roles",
+                        f"/guilds/{generated['id']}/emojis/{emoji_id}",
+                        "/guilds/1",
+                        "/channels/1",
+                    ],
+                )
+
+        statuses = [status for status, _, _ in responses]
+        assert statuses == [200, 200, 200, 200, 200, 200, 404, 404]
+        assert responses[0][2] == ctx.users.get(generated["owner_id"])
+        assert responses[1][2]["id"] == generated["id"]
+        assert [m["user"]["id"] for m in responses[2][2]] == ids[2:4], "Bad page"
+        assert responses[3][2]["user"]["id"] == ids[3]
+        assert len(responses[4][2]) == 2
+        assert responses[5][2]["id"] == emoji_id
+        assert responses[6][2]["code"] == 10004
+        assert responses[0][1]["x-ratelimit-limit"] == "50"
+
+    asyncio.run(run())
+
+
+def test_rest_rate_limit() -> None:
+    async def run() -> List[Response]:
+        with context.isolated(seed=7) as ctx:
+            generated = guild.generate()
+            async with RestServer([generated], rate_limit=RateLimit(2, 60)) as server:
+                responses = await _get(server, [f"/guilds/{generated['id']}"] * 3)
+            listeners = ctx.users._listeners  # pyright: ignore[reportPrivateUsage]
+            assert not listeners, "Payload cache of a closed server still listens"
+            return responses
+
+    responses = asyncio.run(run())
+    assert [status for status, _, _ in responses] == [200, 200, 429]
+    assert [headers["x-ratelimit-remaining"] for _, headers, _ in responses] == [
+        "1",
+        "0",
+        "0",
+    ]
+    assert responses[2][2]["retry_after"] > 0
+
+
+def test_rest_messages() -> None:
+    async def run() -> List[Response]:
+        with context.isolated(seed=8):
+            generated = channel.generate()
+            history = MessageHistory(str(generated["id"]), [1], 1000)
+            middle = history.ids[500]
+            async with RestServer(rate_limit=None) as server:
+                server.add_channel(generated, history)
+                return await _get(
+                    server,
+                    [
+                        f"/channels/{generated['id']}",
+                        f"/channels/{generated['id']}/messages?limit=100&before={middle}",
+                        f"/channels/{generated['id']}/messages/{middle}",
+                        f"/channels/{generated['id']}/messages/1",
+                        f"/channels/{generated['id']}/messages?limit=101",
+                    ],
+                )
+
+    responses = asyncio.run(run())
+    assert [status for status, _, _ in responses] == [200, 200, 200, 404, 400]
+    assert len(responses[1][2]) == 100
+    assert int(responses[1][2][0]["id"]) < int(responses[2][2]["id"])
+    assert responses[3][2]["code"] == 10008
+
+
+def test_rest_bad_request() -> None:
+    async def run() -> bytes:
+        with context.isolated(seed=9):
+            async with RestServer() as server:
+                reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+                writer.write(
+                    b"GET /api/v10/users/1 HTTP/1.1\r\nContent-Length: x\r\n\r\n"
+                )
+                response = await reader.read()
+                writer.close()
+                return response
+
+    assert asyncio.run(run()).startswith(b"HTTP/1.1 400 Bad Request\r\n")
@@ -0,0 +1,75 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from disfake.core import context
+from disfake.gateway import events
+from disfake.gateway.session import GatewayClosed, GatewaySession, dispatch_mix
+from disfake.http import guild
+
+
+def test_session_stream() -> None:
+    async def run() -> List[Dict[str, Any]]:
+        with context.isolated(seed=4) as ctx:
+            guilds = [guild.generate(member_count=2) for _ in range(2)]
+            members = ctx.members.get(guilds[0]["id"])
+            assert members is not None
+            typing = dispatch_mix(
+                {"typing": lambda: events.typing_start(guilds[0]["id"], members[0])}
+            )
+            session = GatewaySession(guilds=guilds, dispatch=typing)
+
+            received = [json.loads(await session.recv())]
+            await session.send({"op": 2, "d": {}})
+            await session.send({"op": 1, "d": None})
+            received += [json.loads(await session.recv()) for _ in range(8)]
+
+            await session.send({"op": 99})
+            try:
+                await session.recv()
+            except GatewayClosed as closed:
+                assert closed.code == 4001
+            else:
+                raise AssertionError("Session not closed")
+            return received
+
+    received = asyncio.run(run())
+    assert received[0]["op"] == 10, "HELLO not sent first"
+    assert [event.get("t") for event in received[1:5]] == [
+        "READY",
+        "GUILD_CREATE",
+        "GUILD_CREATE",
+        None,
+    ]
+    assert received[4]["op"] == 11, "Heartbeat not acknowledged"
+    assert all(event["t"] == "TYPING_START" for event in received[5:])
+
+    sequences = [event["s"] for event in received if event["op"] == 0]
+    assert sequences == list(range(1, len(sequences) + 1)), "Sequence not monotonic"
+
+
+def test_session_rate() -> None:
+    async def run() -> float:
+        with context.isolated(seed=5):
+            session = GatewaySession(dispatch=iter(events.resumed, None), rate=200)
+            await session.send({"op": 2, "d": {}})
+            await session.recv()
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for _ in range(20):
+                await session.recv()
+            return loop.time() - start
+
+    assert 0.08 <= asyncio.run(run()) < 0.5, "Dispatch events not paced"
+
+
+def test_session_close_payloads() -> None:
+    async def run() -> None:
+        with context.isolated(seed=6) as ctx:
+            listeners = ctx.users._listeners  # pyright: ignore[reportPrivateUsage]
+            for _ in range(10):
+                session = GatewaySession()
+                await session.close()
+            assert not listeners, "Payload cache of a closed session still listens"
+
+    asyncio.run(run())
@@ -0,0 +1,76 @@
+from pathlib import Path
+
+from disfake import snapshot, world
+from disfake.core import context
+from disfake.core.records import MemberRecords
+from disfake.http import guild
+
+
+def test_snapshot_roundtrip(tmp_path: Path) -> None:
+    path = tmp_path / "world.snapshot"
+    with context.isolated(seed=1) as ctx:
+        guilds = [guild.generate(member_count=5, role_count=2) for _ in range(3)]
+        lazy = guild.generate(member_count=10, lazy_members=True)
+        snapshot.save(path, [*guilds, lazy])
+        user_ids = list(ctx.users)
+        expected = guild.generate(member_count=2)
+
+    with snapshot.load(path) as loaded:
+        assert list(loaded.guilds) == [*guilds, lazy], "Guilds changed"
+        assert len(loaded.context.users) == len(user_ids), "Users missing"
+        for id in user_ids:
+            assert loaded.context.users.get(id) == ctx.users.get(id)
+
+        for generated in guilds:
+            members = loaded.context.members.get(generated["id"])
+            original = ctx.members.get(generated["id"])
+            assert members is not None and original is not None
+            assert list(members) == list(original), "Members changed"
+            assert members.find(generated["owner_id"]) == original[0]
+            assert members.find("1") is None
+
+        lazy_members = loaded.context.members.get(lazy["id"])
+        assert isinstance(lazy_members, guild.LazyMembers)
+        assert isinstance(lazy_members.ids, range), "Lazy ids not a range"
+        assert len(lazy_members) == 11
+
+        with context.use(loaded.context):
+            restored = guild.generate(member_count=2)
+        assert restored == expected, "Allocator state not restored"
+
+
+def test_snapshot_users_removed(tmp_path: Path) -> None:
+    path = tmp_path / "users.snapshot"
+    with context.isolated(seed=2) as ctx:
+        generated = guild.generate(member_count=3)
+        snapshot.save(path, [generated])
+
+    with snapshot.load(path) as loaded:
+        users = loaded.context.users
+        assert generated["owner_id"] in users
+        assert users.remove(generated["owner_id"]) == ctx.users.get(
+            generated["owner_id"]
+        )
+        assert generated["owner_id"] not in users
+        assert users.get(generated["owner_id"]) is None
+        assert len(users) == 3
+
+
+def test_snapshot_records(tmp_path: Path) -> None:
+    path = tmp_path / "records.snapshot"
+    with context.isolated(seed=3) as ctx:
+        guilds = world.generate_world(5, 200, 40)
+        snapshot.save(path, guilds)
+
+    # Records are stored as their IDs instead of rendered JSON, which took
+    # around 100kB, the rest is mostly the states of the random generators
+    assert path.stat().st_size < 30_000, "Records rendered"
+    with snapshot.load(path) as loaded:
+        assert len(loaded.context.users) == 200
+        assert loaded.context.users.records.ids() == ctx.users.records.ids()
+        for generated in guilds:
+            members = loaded.context.members.get(generated["id"])
+            original = ctx.members.get(generated["id"])
+            assert isinstance(members, MemberRecords), "Records not restored"
+            assert isinstance(original, MemberRecords)
+            assert members.ids() == original.ids()
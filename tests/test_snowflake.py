@@ -1,7 +1,9 @@
 from datetime import datetime
 
+import pytest
+
 from disfake.core.cache import snowflake
-from disfake.core.snowflake import to_datetime
+from disfake.core.snowflake import Snowflake, to_datetime, to_datetimes
 
 now = datetime.now()
 
@@ -36,7 +38,68 @@ def test_to_datetime() -> None:
 
 
 def test_snowflake_accurate() -> None:
+    # Taken here, the suite may run for longer than a second before this test
+    now = datetime.now()
     flake = snowflake.snowflake()
     assert int(to_datetime(flake).timestamp()) == int(
         now.timestamp()
     ), "Snowflake is not accurate. Make sure test_to_datetime passes"
+
+
+def test_increment_overflow() -> None:
+    flakes = Snowflake(1, 2)
+    flakes._now = now.timestamp()  # pyright: ignore[reportPrivateUsage]
+
+    for _ in range(5000):
+        flake = flakes.snowflake()
+        assert (flake >> 17) & 0x1F == 1, "Worker bits corrupted"
+        assert (flake >> 12) & 0x1F == 2, "Process bits corrupted"
+
+
+def test_block() -> None:
+    flakes = Snowflake(0, 0)
+    flakes._now = now.timestamp()  # pyright: ignore[reportPrivateUsage]
+
+    block = flakes.block(100)
+    assert isinstance(block, range), "Block in a single millisecond not a range"
+    assert list(block) == list(range(block[0], block[0] + 100))
+
+    block = flakes.block(10000)
+    assert len(set(block)) == 10000, "Block contains duplicates"
+    assert list(block) == sorted(block), "Block is not ordered"
+
+    assert not flakes.block(0)
+    with pytest.raises(ValueError):
+        flakes.block(-1)
+    assert flakes.snowflake() > block[-1], "Negative block rewound the increment"
+
+
+def test_rollover() -> None:
+    flakes = Snowflake(0, 0)
+    flakes._now = now.timestamp()  # pyright: ignore[reportPrivateUsage]
+
+    issued = [flakes.snowflake() for _ in range(5000)]
+    issued.extend(flakes.block(5000))
+    assert issued == sorted(set(issued)), "Snowflakes not unique and ordered"
+
+
+def test_history() -> None:
+    assert Snowflake(0, 0).snowflakes is None, "History kept without opt-in"
+
+    flakes = Snowflake(0, 0, history=True, history_limit=3)
+    issued = [flakes.snowflake() for _ in range(5)]
+    assert flakes.snowflakes is not None
+    assert list(flakes.snowflakes) == issued[-3:], "Ring buffer lost order"
+    assert flakes.snowflakes[-1] == issued[-1]
+
+
+def test_to_datetimes() -> None:
+    assert to_datetimes(FLAKES) == [to_datetime(flake) for flake in FLAKES]
+
+
+def test_reserve_increments() -> None:
+    flakes = Snowflake(1, 1)
+    assert flakes.reserve_increments(1) == 4095
+    assert flakes.reserve_increments(95) == 4000
+    with pytest.raises(ValueError):
+        flakes.reserve_increments(4001)
@@ -0,0 +1,62 @@
+from pathlib import Path
+from typing import List, Tuple
+
+from discord_typings import UserData
+
+import disfake
+from disfake import snapshot
+from disfake.core import context, generator, stats
+from disfake.http import guild
+
+
+def test_stats() -> None:
+    events: List[Tuple[str, str, float]] = []
+
+    def hook(event: str, name: str, value: float) -> None:
+        events.append((event, name, value))
+
+    stats.reset()
+    with context.isolated(seed=1):
+        generator.generate(UserData)
+        assert disfake.stats().generation == {}, "Recorded while disabled"
+
+        stats.add_hook(hook)
+        try:
+            with stats.collecting():
+                generator.generate(UserData)
+                generator.generate_many(UserData, 10)
+                guild.generate(member_count=5)
+        finally:
+            stats.remove_hook(hook)
+        assert not stats.enabled
+
+        snapshot = disfake.stats(memory=True)
+        assert (
+            snapshot.generation["discord_typings.resources.user.UserData"].count == 11
+        )
+        assert snapshot.caches["factories"].hits >= 2
+        assert snapshot.counters["snowflakes"] > 0
+        assert snapshot.counters["members.add"] >= 5
+        assert snapshot.guilds == 1
+        # The 5 members and the owner, generated users are not cached
+        assert snapshot.users == 6
+        assert snapshot.users_bytes and snapshot.members_bytes
+
+    assert ("cache_hit", "factories", 1) in events
+    assert any(event == "generate" for event, _, _ in events)
+    stats.reset()
+    assert disfake.stats().counters == {}
+
+
+def test_stats_memory_side_effects(tmp_path: Path) -> None:
+    path = tmp_path / "stats.snapshot"
+    with context.isolated(seed=2):
+        generated = guild.generate(member_count=3)
+        snapshot.save(path, [generated])
+
+    with snapshot.load(path) as loaded, context.use(loaded.context) as ctx:
+        ctx.users.add_ids(range(1, 101))
+        collected = disfake.stats(memory=True)
+        # Users of the snapshot are not decoded into the cache
+        assert collected.users_bytes == 100 * 8, "Records not sized by ID"
+        assert collected.users_bytes == disfake.stats(memory=True).users_bytes
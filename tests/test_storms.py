@@ -0,0 +1,115 @@
+import asyncio
+import json
+from collections import Counter
+from typing import Any, Dict, List
+
+from disfake import world
+from disfake.core import context
+from disfake.core.records import MemberRecords
+from disfake.gateway.session import GatewaySession
+from disfake.gateway.storms import EventStorm
+from disfake.http import guild
+
+
+def test_storm_events() -> None:
+    with context.isolated(seed=3) as ctx:
+        guilds = [guild.generate(member_count=4) for _ in range(2)]
+        guild_ids = [guild_["id"] for guild_ in guilds]
+        channels = {guild_ids[0]: ["1", "2"]}
+        storm = EventStorm(guild_ids, channels=channels)
+
+        for event in storm.batch(300):
+            data = event["d"]
+            members = ctx.members.get(data["guild_id"])
+            assert members is not None, "Event of an unknown guild"
+            if event["t"] == "PRESENCE_UPDATE":
+                user_id = data["user"]["id"]
+                assert data["status"] in ("online", "idle", "dnd", "offline")
+            elif event["t"] == "TYPING_START":
+                user_id = data["user_id"]
+                assert data["member"] == members.find(user_id), "Wrong member"
+            else:
+                user_id = data["author"]["id"]
+                assert "user" not in data["member"], "Member of a message has a user"
+            assert members.find(user_id) is not None, "Event of a non member"
+            if "channel_id" in data and data["guild_id"] == guild_ids[0]:
+                assert data["channel_id"] in ("1", "2"), "Channels not used"
+        storm.close()
+
+
+def test_storm_weights() -> None:
+    with context.isolated(seed=4):
+        guild_ = guild.generate(member_count=8)
+        with EventStorm(
+            [guild_["id"]], weights={"PRESENCE_UPDATE": 3, "MESSAGE_CREATE": 1}
+        ) as storm:
+            kinds = Counter(event["t"] for event in storm.batch(4000))
+
+    assert set(kinds) == {"PRESENCE_UPDATE", "MESSAGE_CREATE"}, "Wrong event types"
+    assert 2.5 < kinds["PRESENCE_UPDATE"] / kinds["MESSAGE_CREATE"] < 3.5
+
+
+def test_storm_messages() -> None:
+    with context.isolated(seed=5):
+        guilds = world.generate_world(3, 50, 10)
+        storm = EventStorm([guild_["id"] for guild_ in guilds])
+        ids = [int(event["d"]["id"]) for event in storm.message_creates(1000)]
+
+    assert ids == sorted(set(ids)), "Message IDs not increasing"
+
+
+def test_storm_records() -> None:
+    with context.isolated(seed=8) as ctx:
+        guilds = world.generate_world(2, 100, 20)
+        with EventStorm([guild_["id"] for guild_ in guilds]) as storm:
+            events = storm.typing_starts(100)
+            members = ctx.members.get(guilds[0]["id"])
+            assert isinstance(members, MemberRecords)
+            user_ids = storm._user_ids  # pyright: ignore[reportPrivateUsage]
+            assert user_ids[guilds[0]["id"]] is members.ids(), "Member IDs copied"
+
+    for event in events:
+        data = event["d"]
+        assert data["member"] == ctx.members.member(data["guild_id"], data["user_id"])
+
+
+def test_storm_members_changed() -> None:
+    with context.isolated(seed=6) as ctx:
+        guild_ = guild.generate(member_count=3)
+        storm = EventStorm([guild_["id"]])
+        storm.typing_starts(10)
+
+        members = ctx.members.get(guild_["id"])
+        assert members is not None
+        user_ids = list(members.user_ids())
+        for user_id in user_ids[1:]:
+            ctx.members.remove(guild_["id"], user_id)
+        typing = {event["d"]["user_id"] for event in storm.typing_starts(50)}
+        storm.close()
+
+    assert typing == {user_ids[0]}, "Removed members still picked"
+
+
+def test_storm_session() -> None:
+    async def run() -> List[Dict[str, Any]]:
+        with context.isolated(seed=7) as ctx:
+            guilds = [guild.generate(member_count=2)]
+            storm = EventStorm([guilds[0]["id"]], batch_size=16)
+            session = GatewaySession(guilds=guilds, dispatch=storm)
+            await session.recv()
+            await session.send({"op": 2, "d": {}})
+            received = [json.loads(await session.recv()) for _ in range(40)]
+            await session.close()
+            listeners = ctx.users._listeners  # pyright: ignore[reportPrivateUsage]
+            assert not listeners, "Storm of a closed session still listens"
+            return received
+
+    received = asyncio.run(run())
+    assert [event["t"] for event in received[:2]] == ["READY", "GUILD_CREATE"]
+    assert {event["t"] for event in received[2:]} <= {
+        "PRESENCE_UPDATE",
+        "TYPING_START",
+        "MESSAGE_CREATE",
+    }
+    sequences = [event["s"] for event in received]
+    assert sequences == list(range(1, 41)), "Sequence not monotonic"
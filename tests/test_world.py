@@ -0,0 +1,65 @@
+import json
+from typing import List
+
+from discord_typings import GuildData
+
+from disfake import world
+from disfake.core import context
+from disfake.core.records import MemberRecords
+from disfake.http.guild import LazyMembers
+
+
+def test_generate_guilds() -> None:
+    with context.isolated() as ctx:
+        guilds = world.generate_guilds(8, member_count=3, processes=2, chunk_size=3)
+
+    assert len(guilds) == 8, "Wrong number of guilds generated"
+    assert len({guild["id"] for guild in guilds}) == 8, "Guild IDs collided"
+
+    for guild in guilds:
+        assert len(ctx.members.get(guild["id"]) or []) == 4, "Members not merged"
+        assert ctx.users.get(guild["owner_id"]) is not None, "Users not merged"
+    assert len(ctx.users) == 32, "User IDs collided"
+    members = ctx.members.get(guilds[0]["id"])
+    assert isinstance(members, MemberRecords), "Members not merged as records"
+
+    with context.isolated() as ctx:
+        guilds = world.generate_guilds(4, member_count=3, lazy_members=True)
+        members = ctx.members.get(guilds[0]["id"])
+        assert isinstance(members, LazyMembers), "Lazy members not kept lazy"
+        assert members.find(guilds[0]["owner_id"]) is not None
+        assert len(ctx.users) == 16, "Users of lazy guilds not merged"
+
+
+def test_generate_guilds_seeded() -> None:
+    def generate(seed: int = 7) -> str:
+        with context.isolated():
+            guilds = world.generate_guilds(
+                4, member_count=2, role_count=2, processes=2, chunk_size=2, seed=seed
+            )
+        return json.dumps(guilds, sort_keys=True)
+
+    assert generate() == generate(), "Seeded worlds differ"
+
+    # Worlds of different seeds can be merged into one context
+    with context.isolated() as ctx:
+        for seed in (1, 2):
+            world.generate_guilds(4, member_count=2, chunk_size=2, seed=seed)
+        assert len(ctx.members) == 8 and len(ctx.users) == 24, "Seeds collided"
+
+
+def test_generate_world() -> None:
+    def generate() -> List[GuildData]:
+        with context.isolated(seed=3) as ctx:
+            guilds = world.generate_world(20, 500, [50] * 19 + [600])
+            assert len(ctx.users) == 500, "Users not shared"
+            sizes = [len(ctx.members.get(guild["id"]) or ()) for guild in guilds]
+            owner = guilds[0]["owner_id"]
+            assert ctx.members.member(guilds[0]["id"], owner) is not None
+            # The most popular user is in most guilds
+            first = next(iter(ctx.users))
+            assert len(ctx.members.guilds_of(first)) > 10, "No overlap"
+        assert sizes == [51] * 19 + [500]
+        return guilds
+
+    assert generate() == generate(), "Seeded worlds differ"